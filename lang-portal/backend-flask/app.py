@@ -2,12 +2,20 @@ from flask import Flask, g
 from flask_cors import CORS
 
 from lib.db import Db
+from lib.response_cache import ResponseCache
+import lib.instrumentation
+import lib.compression
+from lib.review_queue import ReviewWriter
+from lib.jobs import JobRunner
+from lib.json_provider import FastJSONProvider
 
 import routes.words
 import routes.groups
 import routes.study_sessions
 import routes.dashboard
 import routes.study_activities
+import routes.admin
+import routes.jobs
 
 def get_allowed_origins(app):
     try:
@@ -30,17 +38,84 @@ def get_allowed_origins(app):
 
 def create_app(test_config=None):
     app = Flask(__name__)
+
+    # orjson-backed JSON with MessagePack negotiation (see lib/json_provider.py)
+    app.json = FastJSONProvider(app)
     
-    if test_config is None:
-        app.config.from_mapping(
-            DATABASE='words.db'
-        )
-    else:
+    app.config.from_mapping(
+        DATABASE='words.db',
+        DATABASE_POOL_SIZE=5,       # Long-lived connections per process (0 disables pooling)
+        DATABASE_POOL_TIMEOUT=30,   # Seconds to wait for a free pooled connection
+        DATABASE_PRAGMAS={},        # Overrides for lib.db.DEFAULT_PRAGMAS
+        MIGRATE_ON_STARTUP=True,    # Create missing tables and apply pending migrations
+        MAX_REVIEW_ITEMS=10000,     # Largest review_items batch accepted in one request
+        MAX_WORD_LOOKUP_IDS=10000,  # Most word ids resolved by one batch lookup
+        RESPONSE_CACHE_SIZE=512,    # Cached GET responses per process (0 disables the cache)
+        RESPONSE_CACHE_TTL=60,      # Seconds a cached response may be served
+        SQL_INSTRUMENTATION=True,   # Per-request SQL timing (Server-Timing header + log)
+        SLOW_QUERY_MS=None,         # Log statements slower than this with their query plan
+        REVIEW_WRITE_BEHIND=False,  # Queue review results for a background writer thread
+        REVIEW_QUEUE_CAPACITY=10000,    # Review events that may wait in the queue
+        REVIEW_QUEUE_TIMEOUT=1.0,       # Seconds a request waits for queue space before 503
+        REVIEW_FLUSH_INTERVAL_MS=50,    # Writer commits at least this often...
+        REVIEW_FLUSH_SIZE=500,          # ...or as soon as this many events are queued
+        COMPRESSION=True,           # gzip/brotli Content-Encoding for JSON responses
+        COMPRESSION_MIN_SIZE=500,   # Smaller buffered responses are sent uncompressed
+        COMPRESSION_LEVEL=6,        # gzip level (1-9)
+        COMPRESSION_BROTLI_QUALITY=5,   # brotli quality (0-11)
+        RESET_BATCH_SIZE=5000,      # Rows deleted per transaction by a history reset
+        MAX_JOBS=100,               # Finished background jobs kept for GET /api/jobs/<id>
+        BACKUP_DIR='backups',       # Where POST /api/admin/backup writes snapshots
+        BACKUP_PAGES=1024,          # Pages copied per backup step (the writer lock is free in between)
+        BACKUP_KEEP=5,              # Snapshots kept in BACKUP_DIR; older ones are deleted
+        ADMIN_TOKEN=None            # Bearer token for /api/admin/* (unset disables those routes)
+    )
+    # FLASK_<NAME> environment variables override the defaults (e.g. FLASK_ADMIN_TOKEN)
+    app.config.from_prefixed_env()
+    if test_config is not None:
         app.config.update(test_config)
     
     # Initialize database first since we need it for CORS configuration
-    app.db = Db(database=app.config['DATABASE'])
+    app.db = Db(
+        database=app.config['DATABASE'],
+        pool_size=app.config['DATABASE_POOL_SIZE'],
+        pool_timeout=app.config['DATABASE_POOL_TIMEOUT'],
+        pragmas=app.config['DATABASE_PRAGMAS'],
+        instrument=app.config['SQL_INSTRUMENTATION'],
+        slow_query_ms=app.config['SLOW_QUERY_MS']
+    )
+    if app.config['SQL_INSTRUMENTATION']:
+        lib.instrumentation.init_app(app)
+
+    # Negotiated gzip/brotli Content-Encoding (see lib/compression.py)
+    if app.config['COMPRESSION']:
+        lib.compression.init_app(app)
     
+    # Cache for GET responses, invalidated by writes through app.db
+    app.response_cache = ResponseCache(
+        max_entries=app.config['RESPONSE_CACHE_SIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL']
+    )
+    app.db.response_cache = app.response_cache
+
+    # Optional write-behind queue for POST /api/study-sessions/<id>/review
+    app.review_writer = None
+    if app.config['REVIEW_WRITE_BEHIND']:
+        app.review_writer = ReviewWriter(
+            app.db,
+            capacity=app.config['REVIEW_QUEUE_CAPACITY'],
+            flush_interval_ms=app.config['REVIEW_FLUSH_INTERVAL_MS'],
+            flush_size=app.config['REVIEW_FLUSH_SIZE']
+        ).start()
+
+    # Background jobs (history reset, ...), see lib/jobs.py
+    app.jobs = JobRunner(max_jobs=app.config['MAX_JOBS'])
+
+    # Upgrade existing databases in place before serving requests
+    if app.config['MIGRATE_ON_STARTUP']:
+        with app.app_context():
+            app.db.setup_tables(app.db.cursor())
+
     # Get allowed origins from study_activities table
     allowed_origins = get_allowed_origins(app)
     
@@ -57,7 +132,7 @@ def create_app(test_config=None):
         }
     })
 
-    # Close database connection
+    # Return the request's database connection to the pool
     @app.teardown_appcontext
     def close_db(exception):
         app.db.close()
@@ -68,10 +143,13 @@ def create_app(test_config=None):
     routes.study_sessions.load(app)
     routes.dashboard.load(app)
     routes.study_activities.load(app)
+    routes.admin.load(app)
+    routes.jobs.load(app)
     
     return app
 
-app = create_app()
-
+# Only build the default app when run directly, so importing create_app
+# (tests, benchmarks) does not open or migrate ./words.db
 if __name__ == '__main__':
+    app = create_app()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,133 @@
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from lib.db import Db
+from lib.seed import content_hash
+
+# Synthetic words.db generator for benchmarking at production scale.
+#
+# Builds the real schema (setup tables + migrations), bulk loads random
+# words, groups, sessions and review items with the triggers dropped, then
+# recreates the triggers and rebuilds every derived table (counters,
+# rollups, session summaries, search index) exactly as the app maintains them.
+
+SYLLABLES = ['a', 'i', 'u', 'e', 'o', 'ka', 'ki', 'ku', 'ke', 'ko', 'sa', 'shi', 'su', 'se', 'so',
+             'ta', 'chi', 'tsu', 'te', 'to', 'na', 'ni', 'nu', 'ne', 'no', 'ha', 'hi', 'fu', 'he',
+             'ho', 'ma', 'mi', 'mu', 'me', 'mo', 'ya', 'yu', 'yo', 'ra', 'ri', 'ru', 're', 'ro', 'wa', 'n']
+ENGLISH = ['to eat', 'to go', 'to see', 'big', 'small', 'new', 'old', 'to read', 'to write', 'good',
+           'bad', 'to speak', 'to buy', 'red', 'blue', 'to wait', 'to run', 'cold', 'hot', 'quiet']
+
+def random_word(rng, index):
+  length = rng.randint(1, 4)
+  kanji = ''.join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(length))
+  readings = [rng.choice(SYLLABLES) for _ in range(length)]
+  parts = [{"kanji": char, "romaji": [reading]} for char, reading in zip(kanji, readings)]
+  # The index keeps every generated word distinct (unique content hash)
+  english = f"{rng.choice(ENGLISH)} {index}"
+  return kanji, ''.join(readings), english, json.dumps(parts)
+
+def timestamp(value):
+  return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def insert_batches(cursor, sql, rows, batch_size):
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) >= batch_size:
+      cursor.executemany(sql, batch)
+      batch = []
+  if batch:
+    cursor.executemany(sql, batch)
+
+def generate(app, database, words=100000, groups=1000, sessions=100000, review_items=1000000,
+             activities=5, days=365, seed=42, batch_size=10000, force=False):
+  if os.path.exists(database):
+    if not force:
+      raise FileExistsError(f"{database} already exists (use force to overwrite)")
+    for suffix in ('', '-wal', '-shm'):
+      if os.path.exists(database + suffix):
+        os.remove(database + suffix)
+
+  rng = random.Random(seed)
+  db = Db(database=database)
+  started_at = time.perf_counter()
+
+  with app.app_context():
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    connection = cursor.connection
+    connection.execute('PRAGMA synchronous = OFF')
+
+    # Bulk load without per-row trigger work; derived tables are rebuilt below
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+    triggers = cursor.fetchall()
+    for trigger in triggers:
+      cursor.execute(f'DROP TRIGGER {trigger["name"]}')
+
+    print(f"Generating {words} words, {groups} groups, {sessions} sessions, {review_items} review items...")
+
+    insert_batches(cursor, '''
+      INSERT INTO study_activities (name, url, preview_url) VALUES (?, ?, ?)
+    ''', ((f'Activity {i}', f'http://localhost:{8080 + i}', None) for i in range(1, activities + 1)), batch_size)
+
+    insert_batches(cursor, '''
+      INSERT INTO groups (name) VALUES (?)
+    ''', ((f'Group {i}',) for i in range(1, groups + 1)), batch_size)
+
+    def word_rows():
+      for i in range(1, words + 1):
+        kanji, romaji, english, parts = random_word(rng, i)
+        yield (content_hash(kanji, romaji, english), kanji, romaji, english, parts)
+    insert_batches(cursor, '''
+      INSERT INTO words (content_hash, kanji, romaji, english, parts) VALUES (?, ?, ?, ?, ?)
+    ''', word_rows(), batch_size)
+
+    # Every word is in one group; a third are also in a second one
+    def word_group_rows():
+      for word_id in range(1, words + 1):
+        group_id = (word_id - 1) % groups + 1
+        yield (word_id, group_id)
+        if groups > 1 and rng.random() < 0.33:
+          other = rng.randint(1, groups)
+          if other != group_id:
+            yield (word_id, other)
+    insert_batches(cursor, '''
+      INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
+    ''', word_group_rows(), batch_size)
+
+    # Sessions are spread evenly over the last `days` days, oldest first
+    start = datetime.utcnow() - timedelta(days=days)
+    step = timedelta(days=days) / max(sessions, 1)
+    def session_rows():
+      for i in range(sessions):
+        yield (rng.randint(1, groups), rng.randint(1, activities), timestamp(start + step * i))
+    insert_batches(cursor, '''
+      INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, ?, ?)
+    ''', session_rows(), batch_size)
+
+    def review_rows():
+      for _ in range(review_items):
+        session_index = rng.randrange(sessions)
+        created_at = start + step * session_index + timedelta(seconds=rng.randint(0, 1800))
+        yield (rng.randint(1, words), session_index + 1, int(rng.random() < 0.7), timestamp(created_at))
+    if sessions:
+      insert_batches(cursor, '''
+        INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)
+      ''', review_rows(), batch_size)
+
+    for trigger in triggers:
+      cursor.execute(trigger['sql'])
+    connection.commit()
+    loaded_at = time.perf_counter()
+    print(f"Loaded base tables in {loaded_at - started_at:.1f}s, rebuilding derived tables...")
+
+    db.rebuild_rollups(cursor)
+    db.rebuild_word_indexes(cursor)
+    cursor.execute('ANALYZE')
+    connection.commit()
+    db.close()
+
+  print(f"Generated {database} in {time.perf_counter() - started_at:.1f}s.")
@@ -0,0 +1,192 @@
+import json
+import random
+import time
+from flask import g
+
+from app import create_app
+
+# Per-endpoint latency benchmark driven through the Flask test client.
+#
+# For every endpoint it reports p50/p95/p99 latency, SQL statements per
+# request (as counted by lib/instrumentation.py for the Server-Timing header,
+# i.e. one per execute, however many trigger steps or executemany rows it
+# runs), SQLite VM steps per request (a proxy for rows scanned; the sqlite3
+# module does not expose per-statement scan counters) and how many of the
+# statements run a full table scan according to EXPLAIN QUERY PLAN.
+
+PROGRESS_STEPS = 1000  # VM instructions between progress handler calls
+
+class QueryStats:
+  def __init__(self):
+    self.queries = 0
+    self.statements = []
+    self.progress_calls = 0
+
+  # Trace callback: keep the SQL text for the query plan check, skipping
+  # trigger bodies ("-- ..." lines) and the internal queries of virtual tables
+  # such as FTS5. Not used for counting: the callback also fires once per
+  # executemany row.
+  def trace(self, statement):
+    if statement.startswith('--') or "'main'." in statement:
+      return
+    self.statements.append(statement)
+
+  def reset(self):
+    self.queries = 0
+    self.statements = []
+    self.progress_calls = 0
+
+# Wrap Db.connect so every connection the app opens reports into `stats`, and
+# collect the per-request statement count once the request (and any streamed
+# body) is done
+def instrument(app, stats):
+  connect = app.db.connect
+
+  @app.teardown_appcontext
+  def collect_queries(exception):
+    request_stats = g.get('sql_stats')
+    if request_stats is not None:
+      stats.queries += request_stats.statements
+
+  def instrumented_connect():
+    connection = connect()
+    connection.set_trace_callback(stats.trace)
+    def progress():
+      stats.progress_calls += 1
+      return 0
+    connection.set_progress_handler(progress, PROGRESS_STEPS)
+    return connection
+
+  # Connections opened at startup are not instrumented; start from a fresh pool
+  app.db.close_pool()
+  app.db.connect = instrumented_connect
+
+# Statements whose plan contains a table SCAN (as opposed to an index SEARCH)
+def full_scans(connection, statements, cache):
+  scans = 0
+  for statement in statements:
+    if statement not in cache:
+      cache[statement] = False
+      if statement.lstrip().upper().startswith('SELECT'):
+        try:
+          plan = connection.execute('EXPLAIN QUERY PLAN ' + statement).fetchall()
+          cache[statement] = any(row[3].startswith('SCAN') and 'INDEX' not in row[3] for row in plan)
+        except Exception:
+          pass
+    scans += cache[statement]
+  return scans
+
+def percentile(values, fraction):
+  ordered = sorted(values)
+  if not ordered:
+    return 0
+  index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+  return ordered[index]
+
+# (name, method, url, json body) for every endpoint, with ids picked from the data
+def endpoints(connection, rng, include_writes=False):
+  def max_id(table):
+    return connection.execute(f'SELECT COALESCE(MAX(id), 1) FROM {table}').fetchone()[0]
+
+  words = max_id('words')
+  groups = max_id('groups')
+  sessions = max_id('study_sessions')
+  activities = max_id('study_activities')
+  parts = [row[0] for row in connection.execute('SELECT DISTINCT kanji FROM word_parts LIMIT 100')] or ['行']
+
+  def word_ids(count=50):
+    return [rng.randint(1, words) for _ in range(count)]
+
+  cases = [
+    ('GET /api/words', lambda: ('GET', '/api/words?page=1', None)),
+    ('GET /api/words (deep page)', lambda: ('GET', f'/api/words?page={max(1, words // 50 - 1)}', None)),
+    ('GET /api/words (cursor)', lambda: ('GET', '/api/words?cursor=&sort_by=correct_count&order=desc', None)),
+    ('GET /api/words/<id>', lambda: ('GET', f'/api/words/{rng.randint(1, words)}', None)),
+    ('GET /api/words?ids= (50 ids)', lambda: ('GET', '/api/words?ids=' + ','.join(map(str, word_ids())), None)),
+    ('POST /api/words/batch (50 ids)', lambda: ('POST', '/api/words/batch', {"ids": word_ids()})),
+    ('GET /api/words/search', lambda: ('GET', '/api/words/search?q=to', None)),
+    ('GET /api/words/mastered', lambda: ('GET', '/api/words/mastered', None)),
+    ('GET /api/words/struggling', lambda: ('GET', '/api/words/struggling', None)),
+    ('GET /api/words/by-part', lambda: ('GET', f'/api/words/by-part?kanji={rng.choice(parts)}', None)),
+    ('GET /api/groups', lambda: ('GET', '/api/groups?sort_by=words_count&order=desc', None)),
+    ('GET /api/groups/<id>', lambda: ('GET', f'/api/groups/{rng.randint(1, groups)}', None)),
+    ('GET /api/groups/<id>/words', lambda: ('GET', f'/api/groups/{rng.randint(1, groups)}/words', None)),
+    ('GET /api/groups/<id>/due', lambda: ('GET', f'/api/groups/{rng.randint(1, groups)}/due', None)),
+    ('GET /api/groups/<id>/words/raw', lambda: ('GET', f'/api/groups/{rng.randint(1, groups)}/words/raw', None)),
+    ('GET /api/groups/<id>/study_sessions', lambda: ('GET', f'/api/groups/{rng.randint(1, groups)}/study_sessions?sort_by=endTime', None)),
+    ('GET /api/study-sessions', lambda: ('GET', '/api/study-sessions', None)),
+    ('GET /api/study-sessions/<id>', lambda: ('GET', f'/api/study-sessions/{rng.randint(1, sessions)}', None)),
+    ('GET /api/study-activities', lambda: ('GET', '/api/study-activities', None)),
+    ('GET /api/study-activities/<id>/sessions', lambda: ('GET', f'/api/study-activities/{rng.randint(1, activities)}/sessions', None)),
+    ('GET /api/study-activities/<id>/launch', lambda: ('GET', f'/api/study-activities/{rng.randint(1, activities)}/launch', None)),
+    ('GET /dashboard/recent-session', lambda: ('GET', '/dashboard/recent-session', None)),
+    ('GET /dashboard/stats', lambda: ('GET', '/dashboard/stats', None)),
+  ]
+  if include_writes:
+    cases += [
+      ('POST /api/study-sessions', lambda: ('POST', '/api/study-sessions',
+        {"group_id": rng.randint(1, groups), "study_activity_id": rng.randint(1, activities)})),
+      ('POST /api/study-sessions/<id>/review (20 items)', lambda: ('POST', f'/api/study-sessions/{rng.randint(1, sessions)}/review',
+        {"review_items": [{"word_id": rng.randint(1, words), "correct": rng.random() < 0.7} for _ in range(20)]})),
+    ]
+  return cases
+
+def run(database, requests=50, include_writes=False, seed=42, output=None):
+  # Caching would hide the cost of the queries being measured
+  app = create_app({'DATABASE': database, 'RESPONSE_CACHE_SIZE': 0})
+  stats = QueryStats()
+  instrument(app, stats)
+  client = app.test_client()
+  rng = random.Random(seed)
+
+  explain_connection = app.db.connect()
+  plan_cache = {}
+  results = []
+
+  for name, make_request in endpoints(explain_connection, rng, include_writes):
+    latencies = []
+    queries = []
+    steps = []
+    scans = []
+    for i in range(requests + 1):
+      method, url, body = make_request()
+      stats.reset()
+      started_at = time.perf_counter()
+      response = client.open(url, method=method, json=body)
+      response.get_data()  # Drain streamed responses
+      elapsed = (time.perf_counter() - started_at) * 1000
+      if response.status_code >= 500:
+        raise RuntimeError(f"{name}: {url} returned {response.status_code}: {response.get_data(as_text=True)}")
+      if i == 0:
+        continue  # Warm-up request
+      latencies.append(elapsed)
+      queries.append(stats.queries)
+      steps.append(stats.progress_calls * PROGRESS_STEPS)
+      scans.append(full_scans(explain_connection, stats.statements, plan_cache))
+
+    results.append({
+      "endpoint": name,
+      "requests": requests,
+      "p50_ms": percentile(latencies, 0.50),
+      "p95_ms": percentile(latencies, 0.95),
+      "p99_ms": percentile(latencies, 0.99),
+      "queries_per_request": sum(queries) / len(queries),
+      "vm_steps_per_request": sum(steps) / len(steps),
+      "full_scans_per_request": sum(scans) / len(scans)
+    })
+
+  explain_connection.close()
+  print_report(results)
+  if output:
+    with open(output, 'w') as file:
+      json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
+  return results
+
+def print_report(results):
+  header = f"{'endpoint':<50} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'vm steps':>10} {'scans':>6}"
+  print(header)
+  print('-' * len(header))
+  for result in results:
+    print(f"{result['endpoint']:<50} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+          f"{result['queries_per_request']:>8.1f} {result['vm_steps_per_request']:>10.0f} {result['full_scans_per_request']:>6.1f}")
@@ -0,0 +1,92 @@
+import json
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+import lib.json_provider
+
+# Response serialization benchmark: the stock Flask JSON provider (json
+# module) against lib/json_provider.py (orjson) and its MessagePack
+# negotiation.
+#
+# For each endpoint the same requests are sent through the Flask test client
+# with every provider; the report has requests per second, mean latency and
+# response size. The response cache is disabled, so every request builds and
+# serializes its body.
+
+ENDPOINTS = [
+  ('GET /api/words', '/api/words?page=1'),
+  ('GET /api/words (cursor)', '/api/words?cursor=&sort_by=correct_count&order=desc'),
+  ('GET /api/words?ids= (50)', '/api/words?ids=' + ','.join(str(id) for id in range(1, 51))),
+  ('GET /api/words?ids= (500)', '/api/words?ids=' + ','.join(str(id) for id in range(1, 501))),
+  ('GET /api/groups/1/words', '/api/groups/1/words'),
+  ('GET /api/study-sessions', '/api/study-sessions'),
+  ('GET /dashboard/stats', '/dashboard/stats'),
+]
+
+# The stock provider, taught to serialize sqlite3.Row like the app's provider
+class StockJSONProvider(DefaultJSONProvider):
+  default = staticmethod(lib.json_provider.default)
+
+# (name, provider class, Accept header)
+VARIANTS = [
+  ('stock json', StockJSONProvider, 'application/json'),
+  ('orjson', lib.json_provider.FastJSONProvider, 'application/json'),
+  ('msgpack', lib.json_provider.FastJSONProvider, lib.json_provider.MSGPACK_MIMETYPE),
+]
+
+def measure(client, url, accept, requests):
+  client.get(url, headers={'Accept': accept})  # Warm-up request
+  size = 0
+  started_at = time.perf_counter()
+  for _ in range(requests):
+    response = client.get(url, headers={'Accept': accept})
+    if response.status_code != 200:
+      raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)}")
+    size = len(response.get_data())
+  elapsed = time.perf_counter() - started_at
+  return requests / elapsed, elapsed * 1000 / requests, size
+
+def run(database, requests=200, output=None):
+  app = create_app({'DATABASE': database, 'RESPONSE_CACHE_SIZE': 0, 'SQL_INSTRUMENTATION': False})
+  client = app.test_client()
+
+  variants = VARIANTS
+  if lib.json_provider.orjson is None:
+    print("orjson is not installed; the 'orjson' variant uses the json module")
+  if lib.json_provider.msgpack is None:
+    print("msgpack is not installed; skipping the 'msgpack' variant")
+    variants = [variant for variant in VARIANTS if variant[0] != 'msgpack']
+
+  results = []
+  for name, url in ENDPOINTS:
+    for variant, provider_class, accept in variants:
+      app.json = provider_class(app)
+      per_second, mean_ms, size = measure(client, url, accept, requests)
+      results.append({
+        "endpoint": name,
+        "variant": variant,
+        "requests": requests,
+        "requests_per_second": per_second,
+        "mean_ms": mean_ms,
+        "response_bytes": size
+      })
+
+  print_report(results)
+  if output:
+    with open(output, 'w') as file:
+      json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
+  return results
+
+def print_report(results):
+  baselines = {result['endpoint']: result['requests_per_second']
+               for result in results if result['variant'] == 'stock json'}
+  header = f"{'endpoint':<32} {'variant':<12} {'req/s':>9} {'mean ms':>8} {'bytes':>8} {'speedup':>8}"
+  print(header)
+  print('-' * len(header))
+  for result in results:
+    speedup = result['requests_per_second'] / baselines[result['endpoint']]
+    print(f"{result['endpoint']:<32} {result['variant']:<12} {result['requests_per_second']:>9.0f} "
+          f"{result['mean_ms']:>8.2f} {result['response_bytes']:>8} {speedup:>7.2f}x")
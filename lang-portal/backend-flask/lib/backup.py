@@ -0,0 +1,151 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+
+# Online snapshots of the live database (invoke backup, POST /api/admin/backup).
+#
+# Copying words.db while the app writes to it can produce a torn file (and
+# misses whatever is still in words.db-wal). sqlite3.Connection.backup copies
+# consistent pages instead, `pages` at a time, and we sleep between steps so
+# writers get the lock. If the source changes through another connection,
+# SQLite restarts the copy; after `max_restarts` restarts we finish with one
+# step, which under WAL only needs a read snapshot and does not block writers.
+#
+# Snapshots are written next to the target and renamed into place once they
+# pass `PRAGMA integrity_check`, so a failed backup never leaves a partial file.
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+class BackupError(Exception):
+  pass
+
+class BackupRestarted(Exception):
+  pass
+
+# Snapshot `source` (an open sqlite3 connection) to `path`. With compress=True
+# the file is gzipped. `progress(copied, total)` is called after every step.
+# Returns a summary dict.
+def backup_database(source, path, pages=1024, pause=0.005, compress=False, verify=True,
+                    max_restarts=3, progress=None):
+  started_at = time.perf_counter()
+  directory = os.path.dirname(os.path.abspath(path))
+  os.makedirs(directory, exist_ok=True)
+  snapshot_path = path + '.tmp'
+  remove_database_files(snapshot_path)
+
+  restarts = 0
+  try:
+    target = sqlite3.connect(snapshot_path)
+    try:
+      state = {"remaining": None}
+
+      def step(status, remaining, total):
+        nonlocal restarts
+        if state["remaining"] is not None and remaining > state["remaining"]:
+          restarts += 1
+          if restarts > max_restarts:
+            raise BackupRestarted()
+        state["remaining"] = remaining
+        if progress is not None:
+          progress(total - remaining, total)
+        time.sleep(pause)
+
+      try:
+        source.backup(target, pages=pages, progress=step)
+      except BackupRestarted:
+        source.backup(target, pages=-1)
+
+      # A single self-contained file (the source's WAL mode is copied too)
+      target.execute('PRAGMA journal_mode = DELETE')
+      page_count = target.execute('PRAGMA page_count').fetchone()[0]
+      if verify:
+        check_integrity(target)
+    finally:
+      target.close()
+
+    if compress:
+      with open(snapshot_path, 'rb') as raw, gzip.open(path + '.gz.tmp', 'wb', compresslevel=6) as packed:
+        shutil.copyfileobj(raw, packed, 1024 * 1024)
+      os.remove(snapshot_path)
+      snapshot_path = path + '.gz.tmp'
+    os.replace(snapshot_path, path)
+  except Exception:
+    remove_database_files(snapshot_path)
+    if compress:
+      remove_database_files(path + '.gz.tmp')
+    raise
+
+  return {
+    "path": path,
+    "pages": page_count,
+    "bytes": os.path.getsize(path),
+    "compressed": compress,
+    "verified": verify,
+    "restarts": restarts,
+    "elapsed_seconds": round(time.perf_counter() - started_at, 3)
+  }
+
+# Restore a snapshot (plain or gzipped) into a fresh database file at `path`.
+# Refuses to overwrite an existing database unless force=True. Cheap enough
+# to give every test its own copy of a fixture database.
+def restore_database(backup_path, path, force=False, verify=True):
+  started_at = time.perf_counter()
+  if os.path.exists(path) and not force:
+    raise FileExistsError(f'{path} already exists (use force to overwrite)')
+
+  restore_path = path + '.tmp'
+  remove_database_files(restore_path)
+  try:
+    with open(backup_path, 'rb') as raw:
+      compressed = raw.read(2) == GZIP_MAGIC
+    opener = gzip.open if compressed else open
+    with opener(backup_path, 'rb') as source, open(restore_path, 'wb') as target:
+      shutil.copyfileobj(source, target, 1024 * 1024)
+
+    if verify:
+      connection = sqlite3.connect(restore_path)
+      try:
+        check_integrity(connection)
+      finally:
+        connection.close()
+
+    # Stale -wal/-shm files would be replayed onto the restored database
+    remove_database_files(path)
+    os.replace(restore_path, path)
+  except Exception:
+    remove_database_files(restore_path)
+    raise
+
+  return {
+    "path": path,
+    "bytes": os.path.getsize(path),
+    "compressed": compressed,
+    "verified": verify,
+    "elapsed_seconds": round(time.perf_counter() - started_at, 3)
+  }
+
+# Delete all but the newest `keep` snapshots named words-*.db[.gz] in
+# `directory` (the names POST /api/admin/backup uses). Returns the removed paths.
+def prune_backups(directory, keep):
+  snapshots = sorted(
+    name for name in os.listdir(directory)
+    if name.startswith('words-') and (name.endswith('.db') or name.endswith('.db.gz'))
+  )
+  removed = []
+  for name in snapshots[:max(0, len(snapshots) - keep)]:
+    path = os.path.join(directory, name)
+    os.remove(path)
+    removed.append(path)
+  return removed
+
+def check_integrity(connection):
+  problems = [row[0] for row in connection.execute('PRAGMA integrity_check').fetchall()]
+  if problems != ['ok']:
+    raise BackupError('Integrity check failed: ' + '; '.join(problems[:10]))
+
+def remove_database_files(path):
+  for suffix in ('', '-wal', '-shm', '-journal'):
+    if os.path.exists(path + suffix):
+      os.remove(path + suffix)
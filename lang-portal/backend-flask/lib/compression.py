@@ -0,0 +1,126 @@
+import gzip
+import zlib
+from flask import g, request
+
+# Negotiated Content-Encoding (gzip, and brotli when installed) for API
+# responses.
+#
+# - Buffered responses are compressed once they reach COMPRESSION_MIN_SIZE
+#   bytes. When the body came from (or went into) the response cache, the
+#   compressed bytes are kept on the cache entry, so a hot response is
+#   compressed once per encoding rather than on every request.
+# - Streamed responses (lib/streaming.py) are compressed chunk by chunk and
+#   flushed after every chunk, so clients still receive rows as they are read.
+# - A compressed response gets its own ETag ("<etag>.<encoding>");
+#   lib/conditional.py accepts any of the variants in If-None-Match.
+
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+# Server preference when the client accepts several encodings equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+COMPRESSIBLE_MIMETYPES = (
+  'application/json',
+  'application/x-ndjson',
+  'application/msgpack',
+)
+
+def compressible(response):
+  mimetype = response.mimetype or ''
+  return mimetype in COMPRESSIBLE_MIMETYPES or mimetype.startswith('text/')
+
+# Best encoding the client accepts, or None
+def negotiate_encoding():
+  best, best_quality = None, 0
+  for encoding in ENCODINGS:
+    quality = request.accept_encodings[encoding]
+    if quality > best_quality:
+      best, best_quality = encoding, quality
+  return best
+
+# ETag of the compressed variant of a response
+def etag_variant(etag, encoding):
+  return f'{etag}.{encoding}'
+
+# Every ETag a client may hold for a response with this ETag
+def etag_variants(etag):
+  return [etag] + [etag_variant(etag, encoding) for encoding in ENCODINGS]
+
+def compress(body, encoding, level, brotli_quality):
+  if encoding == 'br':
+    return brotli.compress(body, quality=brotli_quality)
+  return gzip.compress(body, compresslevel=level, mtime=0)
+
+# Compress an iterable of str/bytes chunks, flushing after every chunk
+def compress_stream(chunks, encoding, level, brotli_quality):
+  if encoding == 'br':
+    compressor = brotli.Compressor(quality=brotli_quality)
+    compress_chunk, flush, finish = compressor.process, compressor.flush, compressor.finish
+  else:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    compress_chunk = compressor.compress
+    flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    finish = compressor.flush
+
+  try:
+    for chunk in chunks:
+      if isinstance(chunk, str):
+        chunk = chunk.encode('utf-8')
+      if chunk:
+        yield compress_chunk(chunk) + flush()
+    yield finish()
+  finally:
+    close = getattr(chunks, 'close', None)
+    if close is not None:
+      close()
+
+def init_app(app):
+  min_size = app.config['COMPRESSION_MIN_SIZE']
+  level = app.config['COMPRESSION_LEVEL']
+  brotli_quality = app.config['COMPRESSION_BROTLI_QUALITY']
+
+  @app.after_request
+  def compress_response(response):
+    if request.method == 'HEAD' or not compressible(response) or 'Content-Encoding' in response.headers:
+      return response
+    response.vary.add('Accept-Encoding')
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+      return response
+
+    etag, weak = response.get_etag()
+
+    if response.status_code == 304:
+      # Confirm the variant the client holds
+      if etag and request.if_none_match.contains(etag_variant(etag, encoding)):
+        response.set_etag(etag_variant(etag, encoding), weak)
+      return response
+    if response.status_code < 200 or response.status_code == 204 or response.direct_passthrough:
+      return response
+
+    if response.is_streamed:
+      response.response = compress_stream(response.response, encoding, level, brotli_quality)
+      response.headers.pop('Content-Length', None)
+    else:
+      body = response.get_data()
+      if len(body) < min_size:
+        return response
+
+      # Reuse (or remember) the compressed body of a cached response
+      entry = g.get('response_cache_entry')
+      if entry is not None and entry.body == body:
+        compressed = entry.compressed.get(encoding)
+        if compressed is None:
+          compressed = entry.compressed[encoding] = compress(body, encoding, level, brotli_quality)
+      else:
+        compressed = compress(body, encoding, level, brotli_quality)
+      response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+      response.set_etag(etag_variant(etag, encoding), weak)
+    return response
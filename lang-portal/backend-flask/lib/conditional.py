@@ -0,0 +1,122 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, g, make_response, request
+
+from lib.json_provider import negotiated_format
+from lib.streaming import wants_ndjson
+from lib.compression import etag_variants
+
+# Conditional GET support.
+#
+# Every write to a base table bumps its row in table_versions (see
+# sql/migrations/0007_add_table_versions.sql). A route declares the tables
+# its response is built from; the ETag is derived from their versions and the
+# request URL, so an unchanged resource is answered with 304 Not Modified
+# after a single primary key lookup, before the route's own queries run.
+#
+# When the app has a response cache (lib/response_cache.py) the same table
+# list tags the cached response, and a cache hit skips the database entirely.
+#
+# ETags and cache keys include the negotiated response format (JSON, NDJSON
+# or MessagePack, see lib/json_provider.py), so they never get mixed up.
+
+def response_format():
+  return 'ndjson' if wants_ndjson() else negotiated_format()
+
+# "Today" as the rollups see it: SQLite's date('now') is in UTC
+def utc_today():
+  return datetime.now(timezone.utc).date().isoformat()
+
+# (version, updated_at) for each table, in name order
+def table_versions(tables):
+  cursor = current_app.db.cursor()
+  cursor.execute('''
+    SELECT name, version, updated_at
+    FROM table_versions
+    WHERE name IN (SELECT value FROM json_each(?))
+    ORDER BY name
+  ''', (json.dumps(sorted(tables)),))
+  return cursor.fetchall()
+
+# Strong ETag for the current request given the table versions it depends on
+def compute_etag(versions, per_day=False):
+  key = [request.path, sorted(request.args.items(multi=True)), response_format()]
+  key.extend((row['name'], row['version']) for row in versions)
+  if per_day:
+    # Responses that depend on "today" (streaks, last 30 days) change at midnight
+    key.append(utc_today())
+  return hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+
+# Most recent change to any of the tables, as an aware UTC datetime
+def last_modified(versions):
+  timestamps = [row['updated_at'] for row in versions if row['updated_at']]
+  if not timestamps:
+    return None
+  return datetime.strptime(max(timestamps), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+def not_modified(etag, modified_at):
+  if request.if_none_match:
+    # The client may hold a compressed variant (see lib/compression.py)
+    return any(request.if_none_match.contains(variant) for variant in etag_variants(etag))
+  if request.if_modified_since and modified_at:
+    return modified_at <= request.if_modified_since
+  return False
+
+# Response cache key: route + normalized query args + response format
+def cache_key(per_day=False):
+  key = [request.path, sorted(request.args.items(multi=True)), response_format()]
+  if per_day:
+    key.append(utc_today())
+  return json.dumps(key)
+
+def finish(response, etag, modified_at):
+  response.set_etag(etag)
+  response.vary.add('Accept')
+  if modified_at:
+    response.last_modified = modified_at
+  # Clients may keep the response but must revalidate it before reuse
+  response.cache_control.no_cache = True
+  return response
+
+# Decorator for GET routes: serve from the response cache when possible, emit
+# ETag/Last-Modified and answer If-None-Match / If-Modified-Since with 304
+# without running the route
+def conditional(*tables, per_day=False):
+  def decorator(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+      cache = current_app.response_cache
+      key = cache_key(per_day) if cache.enabled else None
+
+      entry = cache.get(key) if key else None
+      if entry is not None:
+        if not_modified(entry.etag, entry.last_modified):
+          return finish(make_response('', 304), entry.etag, entry.last_modified)
+        g.response_cache_entry = entry
+        response = make_response(entry.body, entry.status)
+        response.content_type = entry.content_type
+        return finish(response, entry.etag, entry.last_modified)
+
+      # Taken before reading the versions: a write that commits while the view
+      # runs invalidates these tables, and the response is then not cached
+      generation = cache.generation(tables) if key else None
+      versions = table_versions(tables)
+      etag = compute_etag(versions, per_day)
+      modified_at = None if per_day else last_modified(versions)
+
+      if not_modified(etag, modified_at):
+        return finish(make_response('', 304), etag, modified_at)
+
+      response = make_response(view(*args, **kwargs))
+      if response.status_code != 200:
+        return response
+
+      # Streamed responses are never buffered into the cache
+      if key and not response.is_streamed:
+        g.response_cache_entry = cache.set(key, tables, response.get_data(), response.status_code,
+                                           response.content_type, etag, modified_at, generation)
+      return finish(response, etag, modified_at)
+    return wrapper
+  return decorator
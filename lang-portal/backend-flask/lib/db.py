@@ -1,16 +1,121 @@
 import sqlite3
 import json
+import os
+import queue
+import threading
+import time
 from flask import g
 
+from lib.seed import content_hash, iter_json_array, batched
+from lib.instrumentation import InstrumentedConnection
+
+# Pragmas applied to every connection when it is opened
+DEFAULT_PRAGMAS = {
+  'journal_mode': 'WAL',      # Readers don't block the writer (and vice versa)
+  'synchronous': 'NORMAL',    # Safe with WAL, avoids an fsync per commit
+  'busy_timeout': 5000,       # Wait (ms) for the write lock instead of "database is locked"
+  'mmap_size': 268435456,     # Memory-map up to 256MB of the database file
+  'cache_size': -20000,       # Negative = size in KiB (~20MB page cache)
+  'temp_store': 'MEMORY'      # Sorts and temp tables stay in memory
+}
+
 class Db:
-  def __init__(self, database='words.db'):
+  def __init__(self, database='words.db', pool_size=0, pool_timeout=30, pragmas=None,
+               instrument=False, slow_query_ms=None):
     self.database = database
     self.connection = None
 
+    # Time statements per request (see lib/instrumentation.py)
+    self.instrument = instrument
+    self.slow_query_ms = slow_query_ms
+
+    # Connection pool: pool_size=0 opens a fresh connection per request
+    self.pool_size = pool_size
+    self.pool_timeout = pool_timeout
+    self.pool = queue.LifoQueue(maxsize=pool_size) if pool_size > 0 else None
+    self.pool_lock = threading.Lock()
+    self.pool_opened = 0
+
+    self.pragmas = dict(DEFAULT_PRAGMAS)
+    if pragmas:
+      self.pragmas.update(pragmas)
+
+    # Optional lib.response_cache.ResponseCache to invalidate on writes
+    self.response_cache = None
+
+  # Open a new, fully configured connection (not tied to a request)
+  def connect(self):
+    if self.instrument:
+      connection = sqlite3.connect(self.database, check_same_thread=False, factory=InstrumentedConnection)
+      connection.slow_query_ms = self.slow_query_ms
+    else:
+      connection = sqlite3.connect(self.database, check_same_thread=False)
+    connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+    for name, value in self.pragmas.items():
+      connection.execute(f'PRAGMA {name} = {value}')
+    connection.create_function('word_hash', 3, content_hash, deterministic=True)
+    return connection
+
+  # Take a connection from the pool, opening a new one while below pool_size
+  def checkout(self):
+    if self.pool is None:
+      return self.connect()
+
+    try:
+      return self.pool.get_nowait()
+    except queue.Empty:
+      pass
+
+    with self.pool_lock:
+      can_open = self.pool_opened < self.pool_size
+      if can_open:
+        self.pool_opened += 1
+    if can_open:
+      try:
+        return self.connect()
+      except Exception:
+        with self.pool_lock:
+          self.pool_opened -= 1
+        raise
+
+    # Pool exhausted: wait for another request to give a connection back
+    try:
+      return self.pool.get(timeout=self.pool_timeout)
+    except queue.Empty:
+      raise sqlite3.OperationalError('Timed out waiting for a database connection from the pool')
+
+  # Give a connection back to the pool (or close it when pooling is off)
+  def checkin(self, connection):
+    if self.pool is None:
+      connection.close()
+      return
+
+    try:
+      # Never hand a connection with an open transaction to the next request
+      if connection.in_transaction:
+        connection.rollback()
+      self.pool.put_nowait(connection)
+    except Exception:
+      connection.close()
+      with self.pool_lock:
+        self.pool_opened -= 1
+
+  # Close every idle pooled connection (e.g. on shutdown)
+  def close_pool(self):
+    if self.pool is None:
+      return
+    while True:
+      try:
+        connection = self.pool.get_nowait()
+      except queue.Empty:
+        break
+      connection.close()
+      with self.pool_lock:
+        self.pool_opened -= 1
+
   def get(self):
     if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
+      g.db = self.checkout()
     return g.db
 
   def commit(self):
@@ -24,7 +129,95 @@ class Db:
   def close(self):
     db = g.pop('db', None)
     if db is not None:
-      db.close()
+      self.checkin(db)
+
+  # Drop cached responses that depend on any of these tables
+  def invalidate(self, *tables):
+    if self.response_cache is not None:
+      self.response_cache.invalidate(*tables)
+
+  # Run sql/maintenance scripts, in order, in a single transaction
+  def run_script(self, cursor, *filepaths):
+    connection = cursor.connection
+    statements = '\n'.join(self.sql(filepath) for filepath in filepaths)
+    try:
+      cursor.executescript(f'''
+        BEGIN;
+        {statements}
+        COMMIT;
+      ''')
+    except Exception:
+      if connection.in_transaction:
+        connection.rollback()
+      raise
+
+  # Recompute all counters and dashboard rollups from the base tables
+  def rebuild_rollups(self, cursor):
+    self.run_script(cursor, 'maintenance/rebuild_rollups.sql', 'maintenance/rebuild_streak.sql')
+    self.invalidate('groups', 'study_sessions', 'word_review_items', 'word_reviews')
+
+  # Recompute only the study streak (from daily_study_stats)
+  def rebuild_streak(self, cursor):
+    self.run_script(cursor, 'maintenance/rebuild_streak.sql')
+
+  # Rebuild the search structures derived from words (full-text index)
+  def rebuild_word_indexes(self, cursor):
+    self.run_script(cursor, 'maintenance/rebuild_word_indexes.sql')
+    self.invalidate('words')
+
+  # Move review answers recorded more than `older_than_days` days ago to
+  # word_review_items_archive, `batch_size` answers per transaction so the
+  # write lock is released between batches. The rollups already include them
+  # and are left as they are (see sql/migrations/0013_add_review_archive.sql).
+  # Returns {"archived", "elapsed_seconds"}.
+  def archive_review_items(self, cursor, older_than_days=90, batch_size=10000):
+    connection = cursor.connection
+    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)')
+    started_at = time.perf_counter()
+    archived = 0
+    while True:
+      try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('DELETE FROM archive_batch')
+        cursor.execute('''
+          INSERT INTO archive_batch (id)
+          SELECT id FROM word_review_items
+          WHERE created_at < datetime('now', ?)
+          LIMIT ?
+        ''', (f'-{int(older_than_days)} days', batch_size))
+        moved = cursor.rowcount
+        if moved:
+          cursor.execute('UPDATE archive_control SET active = 1 WHERE id = 1')
+          cursor.execute('''
+            INSERT INTO word_review_items_archive (id, word_id, study_session_id, correct, created_at)
+            SELECT id, word_id, study_session_id, correct, created_at
+            FROM word_review_items
+            WHERE id IN (SELECT id FROM archive_batch)
+          ''')
+          cursor.execute('DELETE FROM word_review_items WHERE id IN (SELECT id FROM archive_batch)')
+          cursor.execute('UPDATE archive_control SET active = 0 WHERE id = 1')
+        connection.commit()
+      except Exception:
+        if connection.in_transaction:
+          connection.rollback()
+        raise
+
+      archived += moved
+      if moved < batch_size:
+        break
+
+    self.invalidate('word_review_items')
+    return {
+      "archived": archived,
+      "elapsed_seconds": round(time.perf_counter() - started_at, 3)
+    }
+
+  # Read a trigger-maintained row count (see sql/migrations/0003_add_counters.sql)
+  def count(self, name, scope_id=0):
+    cursor = self.cursor()
+    cursor.execute('SELECT value FROM counters WHERE name = ? AND scope_id = ?', (name, scope_id))
+    row = cursor.fetchone()
+    return row[0] if row else 0
 
   # Function to load SQL from a file
   def sql(self, filepath):
@@ -59,55 +252,124 @@ class Db:
     cursor.execute(self.sql('setup/create_table_study_sessions.sql'))
     self.get().commit()
 
+    # Bring the schema up to the latest version
+    self.migrate(cursor)
+
+  # List (version, filename) for every sql/migrations/NNNN_name.sql file, in order
+  def migrations(self):
+    migrations = []
+    for filename in os.listdir('sql/migrations'):
+      if filename.endswith('.sql'):
+        version = int(filename.split('_', 1)[0])
+        migrations.append((version, filename))
+    return sorted(migrations)
+
+  # Current schema version (0 when no migration has been applied yet)
+  def schema_version(self, cursor):
+    cursor.execute('''
+      CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+      )
+    ''')
+    cursor.connection.commit()
+    cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')
+    return cursor.fetchone()[0]
+
+  # Apply pending migrations, each one in its own transaction, so existing
+  # databases are upgraded in place
+  def migrate(self, cursor):
+    connection = cursor.connection
+    current_version = self.schema_version(cursor)
+    applied = []
+
+    for version, filename in self.migrations():
+      if version <= current_version:
+        continue
+      script = self.sql('migrations/' + filename)
+      try:
+        cursor.executescript(f'''
+          BEGIN;
+          {script}
+          INSERT INTO schema_migrations (version, name) VALUES ({version}, '{filename}');
+          COMMIT;
+        ''')
+      except Exception:
+        if connection.in_transaction:
+          connection.rollback()
+        raise
+      applied.append(filename)
+
+    for filename in applied:
+      print(f"Applied migration {filename}")
+    return applied
+
   def import_study_activities_json(self,cursor,data_json_path):
     study_actvities = self.load_json(data_json_path)
     for activity in study_actvities:
+      # Skip activities that were already imported
       cursor.execute('''
-      INSERT INTO study_activities (name,url,preview_url) VALUES (?,?,?)
-      ''', (activity['name'],activity['url'],activity['preview_url'],))
+      INSERT INTO study_activities (name,url,preview_url)
+      SELECT ?,?,?
+      WHERE NOT EXISTS (SELECT 1 FROM study_activities WHERE name = ? AND url = ?)
+      ''', (activity['name'],activity['url'],activity['preview_url'],activity['name'],activity['url'],))
     self.get().commit()
 
-  def import_word_json(self,cursor,group_name,data_json_path):
-      # Insert a new group
-      cursor.execute('''
-        INSERT INTO groups (name) VALUES (?)
-      ''', (group_name,))
-      self.get().commit()
+  # Id of the group with this name, creating it if needed
+  def ensure_group(self,cursor,group_name):
+    cursor.execute('SELECT id FROM groups WHERE name = ? ORDER BY id LIMIT 1', (group_name,))
+    group = cursor.fetchone()
+    if group:
+      return group[0]
+    cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+    return cursor.lastrowid
 
-      # Get the ID of the group
-      cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
-      core_verbs_group_id = cursor.fetchone()[0]
+  # Import words from a JSON array file into a group.
+  #
+  # The file is streamed and written in executemany batches inside a single
+  # transaction. Words are matched by content hash (kanji/romaji/english), so
+  # re-importing a file only inserts new words and updates changed parts.
+  def import_word_json(self,cursor,group_name,data_json_path,batch_size=1000):
+      started_at = time.perf_counter()
+      group_id = self.ensure_group(cursor, group_name)
 
-      # Insert some sample words (verbs) from JSON file and associate with the group
-      words = self.load_json(data_json_path)
+      processed = 0
+      changed = 0
+      for words in batched(iter_json_array(data_json_path), batch_size):
+        rows = [(
+          content_hash(word['kanji'], word['romaji'], word['english']),
+          word['kanji'],
+          word['romaji'],
+          word['english'],
+          json.dumps(word['parts'])
+        ) for word in words]
 
-      for word in words:
-        # Insert the word into the words table
-        cursor.execute('''
-          INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)
-        ''', (word['kanji'], word['romaji'], word['english'], json.dumps(word['parts'])))
-        
-        # Get the last inserted word's ID
-        word_id = cursor.lastrowid
+        # Insert new words; existing ones are only written when their parts changed
+        cursor.executemany('''
+          INSERT INTO words (content_hash, kanji, romaji, english, parts) VALUES (?, ?, ?, ?, ?)
+          ON CONFLICT(content_hash) DO UPDATE SET parts = excluded.parts
+          WHERE parts IS NOT excluded.parts
+        ''', rows)
+        changed += cursor.rowcount
 
-        # Insert the word-group relationship into word_groups table
-        cursor.execute('''
-          INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
-        ''', (word_id, core_verbs_group_id))
-      self.get().commit()
+        # Associate the words with the group (already linked words are skipped)
+        cursor.executemany('''
+          INSERT OR IGNORE INTO word_groups (word_id, group_id)
+          SELECT id, ? FROM words WHERE content_hash = ?
+        ''', [(group_id, row[0]) for row in rows])
 
-      # Update the words_count in the groups table by counting all words in the group
-      cursor.execute('''
-        UPDATE groups
-        SET words_count = (
-          SELECT COUNT(*) FROM word_groups WHERE group_id = ?
-        )
-        WHERE id = ?
-      ''', (core_verbs_group_id, core_verbs_group_id))
+        processed += len(rows)
 
+      # groups.words_count is kept up to date by a trigger on word_groups
       self.get().commit()
+      self.invalidate('words', 'groups', 'word_groups', 'word_reviews')
 
-      print(f"Successfully added {len(words)} verbs to the '{group_name}' group.")
+      elapsed = time.perf_counter() - started_at
+      rate = processed / elapsed if elapsed > 0 else 0
+      print(f"Imported {processed} words into the '{group_name}' group "
+            f"({changed} inserted or updated) in {elapsed:.2f}s ({rate:.0f} words/s).")
+      return {"processed": processed, "changed": changed, "seconds": elapsed}
 
   # Initialize the database with sample data
   def init(self, app):
@@ -0,0 +1,172 @@
+import json
+import logging
+import sqlite3
+import time
+from flask import g, has_app_context, request
+
+# Per-request SQL instrumentation.
+#
+# Connections opened by Db use InstrumentedConnection, whose cursors time every
+# statement (execute plus the fetches that step through its rows). The totals
+# for the current request are kept on flask.g and reported in a Server-Timing
+# header and a structured log line. Statements slower than the configured
+# threshold are logged with their EXPLAIN QUERY PLAN.
+
+logger = logging.getLogger('lang_portal.sql')
+
+class RequestStats:
+  def __init__(self):
+    self.statements = 0
+    self.total_ms = 0.0
+    self.slowest_ms = 0.0
+    self.slowest_sql = None
+
+  def record(self, sql, elapsed_ms):
+    self.statements += 1
+    self.add_time(sql, elapsed_ms)
+
+  def add_time(self, sql, elapsed_ms):
+    self.total_ms += elapsed_ms
+    if elapsed_ms > self.slowest_ms:
+      self.slowest_ms = elapsed_ms
+      self.slowest_sql = sql
+
+def current_stats():
+  if not has_app_context():
+    return None  # Background threads are not instrumented per request
+  if 'sql_stats' not in g:
+    g.sql_stats = RequestStats()
+  return g.sql_stats
+
+def compact(sql):
+  return ' '.join(sql.split())
+
+class InstrumentedCursor(sqlite3.Cursor):
+  def execute(self, sql, parameters=()):
+    started_at = time.perf_counter()
+    try:
+      return super().execute(sql, parameters)
+    finally:
+      self._record(sql, parameters, started_at)
+
+  def executemany(self, sql, seq_of_parameters):
+    started_at = time.perf_counter()
+    try:
+      return super().executemany(sql, seq_of_parameters)
+    finally:
+      self._record(sql, None, started_at)
+
+  def executescript(self, sql_script):
+    started_at = time.perf_counter()
+    try:
+      return super().executescript(sql_script)
+    finally:
+      self._record(sql_script, None, started_at)
+
+  # Rows are produced lazily, so fetching is part of the statement's cost
+  def fetchone(self):
+    started_at = time.perf_counter()
+    try:
+      return super().fetchone()
+    finally:
+      self._add_fetch_time(started_at)
+
+  def fetchmany(self, size=None):
+    started_at = time.perf_counter()
+    try:
+      return super().fetchmany(self.arraysize if size is None else size)
+    finally:
+      self._add_fetch_time(started_at)
+
+  def fetchall(self):
+    started_at = time.perf_counter()
+    try:
+      return super().fetchall()
+    finally:
+      self._add_fetch_time(started_at)
+
+  def _record(self, sql, parameters, started_at):
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    self._last_sql = sql
+    self._last_parameters = parameters
+    self._last_ms = elapsed_ms
+    stats = current_stats()
+    if stats is not None:
+      stats.record(sql, elapsed_ms)
+    self._check_slow()
+
+  def _add_fetch_time(self, started_at):
+    sql = getattr(self, '_last_sql', None)
+    if sql is None:
+      return
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    self._last_ms += elapsed_ms
+    stats = current_stats()
+    if stats is not None:
+      stats.add_time(sql, elapsed_ms)
+    self._check_slow()
+
+  # Log a statement (once) when its time crosses the slow-query threshold
+  def _check_slow(self):
+    threshold = self.connection.slow_query_ms
+    if threshold is None or self._last_ms < threshold or getattr(self, '_logged_sql', None) is self._last_sql:
+      return
+    self._logged_sql = self._last_sql
+    logger.warning(json.dumps({
+      "event": "slow_query",
+      "duration_ms": round(self._last_ms, 3),
+      "sql": compact(self._last_sql),
+      "plan": self.connection.query_plan(self._last_sql, self._last_parameters)
+    }, ensure_ascii=False))
+
+class InstrumentedConnection(sqlite3.Connection):
+  slow_query_ms = None  # Threshold for the slow-query log (None disables it)
+
+  def cursor(self, factory=InstrumentedCursor):
+    return super().cursor(factory)
+
+  # sqlite3.Connection.execute* don't go through cursor(), so route them here
+  def execute(self, sql, parameters=()):
+    return self.cursor().execute(sql, parameters)
+
+  def executemany(self, sql, seq_of_parameters):
+    return self.cursor().executemany(sql, seq_of_parameters)
+
+  def executescript(self, sql_script):
+    return self.cursor().executescript(sql_script)
+
+  # EXPLAIN QUERY PLAN lines for a single statement, on an uninstrumented cursor
+  def query_plan(self, sql, parameters):
+    if parameters is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')):
+      return None
+    try:
+      cursor = super().cursor()
+      cursor.execute('EXPLAIN QUERY PLAN ' + sql, parameters)
+      return [row[3] for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+      return [f"unavailable: {e}"]
+
+# Register the per-request hooks on the app
+def init_app(app):
+  @app.after_request
+  def add_server_timing(response):
+    stats = g.get('sql_stats')
+    if stats is None:
+      return response
+
+    timing = f'db;dur={stats.total_ms:.2f};desc="{stats.statements} queries"'
+    if stats.slowest_sql is not None:
+      timing += f', db-slowest;dur={stats.slowest_ms:.2f}'
+    response.headers.add('Server-Timing', timing)
+
+    logger.info(json.dumps({
+      "event": "request_sql",
+      "method": request.method,
+      "path": request.path,
+      "status": response.status_code,
+      "statements": stats.statements,
+      "sql_ms": round(stats.total_ms, 3),
+      "slowest_ms": round(stats.slowest_ms, 3),
+      "slowest_sql": compact(stats.slowest_sql) if stats.slowest_sql else None
+    }, ensure_ascii=False))
+    return response
@@ -0,0 +1,120 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+# Background jobs for long-running maintenance (reset, backup, ...).
+#
+# A job runs its function on a daemon thread and reports progress through
+# job.update(). The registry keeps the last `max_jobs` jobs so clients can
+# poll GET /api/jobs/<id> until the status is "succeeded" or "failed".
+# Jobs live in process memory: they are not shared between workers and are
+# lost on restart.
+
+logger = logging.getLogger('lang_portal.jobs')
+
+# Raised by JobRunner.submit(exclusive=True) while a job of the kind is running
+class JobRunning(Exception):
+  def __init__(self, job):
+    super().__init__(f'A {job.kind} job is already running')
+    self.job = job
+
+class Job:
+  def __init__(self, kind, params=None):
+    self.id = uuid.uuid4().hex
+    self.kind = kind
+    self.params = params or {}
+    self.status = 'queued'
+    self.progress = {}
+    self.result = None
+    self.error = None
+    self.created_at = datetime.utcnow()
+    self.started_at = None
+    self.finished_at = None
+    self.lock = threading.Lock()
+    self.done = threading.Event()
+
+  # Merge progress counters (called from the job thread)
+  def update(self, **progress):
+    with self.lock:
+      self.progress.update(progress)
+
+  # Wait until the job has finished; False on timeout
+  def wait(self, timeout=None):
+    return self.done.wait(timeout)
+
+  def to_dict(self):
+    with self.lock:
+      return {
+        "id": self.id,
+        "kind": self.kind,
+        "params": self.params,
+        "status": self.status,
+        "progress": dict(self.progress),
+        "result": self.result,
+        "error": self.error,
+        "created_at": self.created_at,
+        "started_at": self.started_at,
+        "finished_at": self.finished_at
+      }
+
+class JobRunner:
+  def __init__(self, max_jobs=100):
+    self.max_jobs = max_jobs
+    self.jobs = OrderedDict()
+    self.lock = threading.Lock()
+
+  # Run fn(job, *args, **kwargs) on a new thread and return the Job. With
+  # exclusive=True, raises JobRunning if a job of the same kind is unfinished.
+  def submit(self, kind, fn, *args, params=None, exclusive=False, **kwargs):
+    job = Job(kind, params)
+    with self.lock:
+      if exclusive:
+        running = self.find_active(kind)
+        if running is not None:
+          raise JobRunning(running)
+      self.jobs[job.id] = job
+      while len(self.jobs) > self.max_jobs:
+        self.jobs.popitem(last=False)
+
+    thread = threading.Thread(
+      target=self.run, args=(job, fn, args, kwargs), name=f'job-{kind}', daemon=True
+    )
+    thread.start()
+    return job
+
+  def get(self, job_id):
+    with self.lock:
+      return self.jobs.get(job_id)
+
+  # Most recent jobs first
+  def list(self):
+    with self.lock:
+      return list(reversed(self.jobs.values()))
+
+  # A queued or running job of this kind, if any (caller holds self.lock)
+  def find_active(self, kind):
+    for job in self.jobs.values():
+      if job.kind == kind and not job.done.is_set():
+        return job
+    return None
+
+  def run(self, job, fn, args, kwargs):
+    with job.lock:
+      job.status = 'running'
+      job.started_at = datetime.utcnow()
+    try:
+      result = fn(job, *args, **kwargs)
+      with job.lock:
+        job.status = 'succeeded'
+        job.result = result
+    except Exception as e:
+      logger.exception('%s job %s failed', job.kind, job.id)
+      with job.lock:
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+      with job.lock:
+        job.finished_at = datetime.utcnow()
+      job.done.set()
@@ -0,0 +1,105 @@
+import dataclasses
+import decimal
+import sqlite3
+import uuid
+from datetime import date
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+# JSON provider for the app (app.json), used by jsonify() in every route.
+#
+# - Serializes with orjson when it is installed (pip install orjson). The
+#   output matches the stock provider (sorted keys, compact separators, dates
+#   as HTTP dates), except that non-ASCII text is written as UTF-8 rather than
+#   \u escapes. Without orjson it falls back to the json module.
+# - sqlite3.Row values serialize as objects, so routes can return fetched rows
+#   without first copying them into dicts.
+# - Clients that send "Accept: application/msgpack" get MessagePack instead
+#   of JSON when msgpack is installed (pip install msgpack). Responses carry
+#   "Vary: Accept", and lib/conditional.py keys ETags and cached responses by
+#   the negotiated format.
+
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+# 'msgpack' when the client prefers MessagePack (and msgpack is installed),
+# otherwise 'json'
+def negotiated_format():
+  if msgpack is None:
+    return 'json'
+  best = request.accept_mimetypes.best_match(['application/json', *MSGPACK_MIMETYPES])
+  return 'msgpack' if best in MSGPACK_MIMETYPES else 'json'
+
+# Same conversions as Flask's stock provider, plus sqlite3.Row
+def default(o):
+  if isinstance(o, sqlite3.Row):
+    return dict(o)
+  if isinstance(o, date):
+    return http_date(o)
+  if isinstance(o, (decimal.Decimal, uuid.UUID)):
+    return str(o)
+  if dataclasses.is_dataclass(o) and not isinstance(o, type):
+    return dataclasses.asdict(o)
+  if hasattr(o, '__html__'):
+    return str(o.__html__())
+  raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+# jsonify(value), jsonify(a, b) or jsonify(key=value), as the stock provider
+def response_obj(args, kwargs):
+  if args and kwargs:
+    raise TypeError('app.json.response() takes either args or kwargs, not both')
+  if not args and not kwargs:
+    return None
+  if len(args) == 1:
+    return args[0]
+  return args or kwargs
+
+class FastJSONProvider(DefaultJSONProvider):
+  default = staticmethod(default)
+
+  def orjson_options(self):
+    # Dates go through default() so they render as HTTP dates, like json does
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if self.sort_keys:
+      option |= orjson.OPT_SORT_KEYS
+    return option
+
+  def dumps(self, obj, **kwargs):
+    if orjson is None or kwargs:
+      return super().dumps(obj, **kwargs)
+    return orjson.dumps(obj, default=self.default, option=self.orjson_options()).decode('utf-8')
+
+  def loads(self, s, **kwargs):
+    if orjson is None or kwargs:
+      return super().loads(s, **kwargs)
+    return orjson.loads(s)
+
+  def response(self, *args, **kwargs):
+    pretty = (self.compact is None and current_app.debug) or self.compact is False
+
+    if negotiated_format() == 'msgpack':
+      obj = response_obj(args, kwargs)
+      body = msgpack.packb(obj, default=self.default, datetime=False)
+      response = current_app.response_class(body, mimetype=MSGPACK_MIMETYPE)
+    elif orjson is not None and not pretty:
+      obj = response_obj(args, kwargs)
+      body = orjson.dumps(obj, default=self.default,
+                          option=self.orjson_options() | orjson.OPT_APPEND_NEWLINE)
+      response = current_app.response_class(body, mimetype=self.mimetype)
+    else:
+      response = super().response(*args, **kwargs)
+
+    if msgpack is not None:
+      response.vary.add('Accept')
+    return response
@@ -0,0 +1,45 @@
+import base64
+import json
+
+# Keyset (cursor) pagination helpers.
+#
+# A cursor is an opaque token holding the sort column, the direction and the
+# (sort value, id) of the last row on the previous page. The next page is
+# fetched with "WHERE (sort_column, id) > (value, id)" which an index on the
+# sort column can seek to directly, instead of discarding OFFSET rows.
+
+def encode_cursor(sort_by, order, value, id):
+  payload = json.dumps([sort_by, order, value, id], separators=(',', ':'))
+  return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, sort_by, order):
+  try:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    cursor_sort_by, cursor_order, value, id = json.loads(base64.urlsafe_b64decode(padded))
+  except Exception:
+    raise ValueError('Invalid cursor')
+
+  if cursor_sort_by != sort_by or cursor_order != order:
+    raise ValueError('Cursor does not match sort_by/order')
+  # Only scalars SQLite can compare against a sort column; bool is an int
+  if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+    raise ValueError('Invalid cursor')
+  if isinstance(id, bool) or not isinstance(id, int):
+    raise ValueError('Invalid cursor')
+  return value, id
+
+# SQL for the keyset condition and ordering; the id column breaks ties so the
+# order is total and no row is skipped or repeated between pages
+def keyset_clause(sort_column, id_column, order):
+  comparison = '>' if order == 'asc' else '<'
+  where = f'({sort_column}, {id_column}) {comparison} (?, ?)'
+  order_by = f'{sort_column} {order}, {id_column} {order}'
+  return where, order_by
+
+# Cursor for the page after `rows`, or None when this was the last page.
+# Routes fetch per_page + 1 rows so `has_more` is known without a COUNT.
+def next_cursor(rows, has_more, sort_by, order):
+  if not has_more or not rows:
+    return None
+  last = rows[-1]
+  return encode_cursor(sort_by, order, last[sort_by], last['id'])
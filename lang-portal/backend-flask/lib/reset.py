@@ -0,0 +1,283 @@
+import json
+import time
+
+from lib.scheduler import schedule_reviews
+
+# Study history reset (POST /api/study-sessions/reset), run as a background
+# job (see lib/jobs.py).
+#
+# Answers and sessions are deleted `batch_size` rows per transaction so the
+# write lock is released between batches and review posts keep going. The
+# delete triggers keep the counters, daily rollups, word mastery and session
+# summaries exact while it runs. The per-word totals in word_reviews are
+# written by the review route, not by triggers, so afterwards they are
+# recomputed for the words whose answers were deleted, again a batch of words
+# per transaction; the study streak is recomputed from daily_study_stats.
+#
+# A reset can be scoped to one group or one study activity. The schedule of
+# every word answered in those sessions is then replayed from the answers that
+# are left (see lib/scheduler.py). Without a scope, `fast=True` drops and
+# recreates the history tables instead of deleting row by row, in one short
+# transaction, and then rebuilds all rollups (as `invoke rebuild-stats` does).
+
+# Tables wiped by a full reset, children first
+HISTORY_TABLES = ('word_review_items', 'word_review_items_archive', 'study_sessions', 'word_schedule')
+
+# Same value as routes.groups.UNSCHEDULED (see 0011_add_word_schedule.sql)
+UNSCHEDULED = '1970-01-01 00:00:00'
+
+def reset_study_history(job, db, group_id=None, study_activity_id=None, fast=False,
+                        batch_size=5000, pause=0.01):
+  scope = None
+  if group_id is not None:
+    scope = ('group_id', group_id)
+  elif study_activity_id is not None:
+    scope = ('study_activity_id', study_activity_id)
+
+  started_at = time.perf_counter()
+  connection = db.connect()
+  try:
+    cursor = connection.cursor()
+    if fast and scope is None:
+      job.update(phase='recreating tables')
+      recreate_history_tables(job, cursor)
+      job.update(phase='rebuilding rollups')
+      db.rebuild_rollups(cursor)
+    else:
+      delete_history(job, cursor, scope, batch_size, pause)
+      job.update(phase='updating words')
+      update_words(job, cursor, scope is not None, batch_size, pause)
+      drop_empty_rollups(cursor)
+      db.rebuild_streak(cursor)
+  finally:
+    connection.close()
+    db.invalidate('word_review_items', 'word_reviews', 'study_sessions', 'groups')
+
+  job.update(phase='done')
+  return {
+    "review_items_deleted": job.progress.get('review_items_deleted'),
+    "study_sessions_deleted": job.progress.get('study_sessions_deleted'),
+    "elapsed_seconds": round(time.perf_counter() - started_at, 3)
+  }
+
+# Delete the answers (recent and archived) of the sessions in scope, then the
+# sessions themselves, batch by batch
+def delete_history(job, cursor, scope, batch_size, pause):
+  if scope is None:
+    sessions_in_scope = 'SELECT id FROM study_sessions'
+    params = ()
+  else:
+    sessions_in_scope = f'SELECT id FROM study_sessions WHERE {scope[0]} = ?'
+    params = (scope[1],)
+
+  # Words whose totals (and, for a scoped reset, schedule) have to be
+  # recomputed once their answers are gone
+  cursor.execute('CREATE TEMP TABLE IF NOT EXISTS reset_words (word_id INTEGER PRIMARY KEY)')
+  cursor.execute('DELETE FROM reset_words')
+  if scope is None:
+    cursor.execute('''
+      INSERT OR IGNORE INTO reset_words (word_id)
+      SELECT word_id FROM word_reviews
+      WHERE correct_count <> 0 OR wrong_count <> 0 OR last_reviewed IS NOT NULL
+    ''')
+  else:
+    cursor.execute(f'''
+      INSERT OR IGNORE INTO reset_words (word_id)
+      SELECT word_id FROM all_word_review_items
+      WHERE study_session_id IN ({sessions_in_scope})
+    ''', params)
+  cursor.connection.commit()
+
+  job.update(phase='deleting review items', review_items_deleted=0, study_sessions_deleted=0)
+  for table in ('word_review_items', 'word_review_items_archive'):
+    if scope is None:
+      condition = ''
+    else:
+      condition = f'WHERE study_session_id IN ({sessions_in_scope})'
+    run_batches(cursor, f'''
+      DELETE FROM {table} WHERE id IN (SELECT id FROM {table} {condition} LIMIT ?)
+    ''', params, batch_size, pause,
+      lambda deleted: job.update(review_items_deleted=job.progress['review_items_deleted'] + deleted))
+
+  # Answers recorded while the reset ran go with their session
+  job.update(phase='deleting study sessions')
+  cursor.execute('CREATE TEMP TABLE IF NOT EXISTS reset_batch (id INTEGER PRIMARY KEY)')
+  while True:
+    connection = cursor.connection
+    try:
+      cursor.execute('BEGIN IMMEDIATE')
+      cursor.execute('DELETE FROM reset_batch')
+      cursor.execute(f'INSERT INTO reset_batch (id) {sessions_in_scope} LIMIT ?', params + (batch_size,))
+      found = cursor.rowcount
+      late_items = 0
+      if found:
+        for table in ('word_review_items', 'word_review_items_archive'):
+          cursor.execute(f'''
+            INSERT OR IGNORE INTO reset_words (word_id)
+            SELECT word_id FROM {table} WHERE study_session_id IN (SELECT id FROM reset_batch)
+          ''')
+          cursor.execute(f'DELETE FROM {table} WHERE study_session_id IN (SELECT id FROM reset_batch)')
+          late_items += cursor.rowcount
+        cursor.execute('DELETE FROM study_sessions WHERE id IN (SELECT id FROM reset_batch)')
+      connection.commit()
+    except Exception:
+      if connection.in_transaction:
+        connection.rollback()
+      raise
+
+    job.update(
+      review_items_deleted=job.progress['review_items_deleted'] + late_items,
+      study_sessions_deleted=job.progress['study_sessions_deleted'] + found
+    )
+    if found < batch_size:
+      break
+    time.sleep(pause)
+
+  if scope is None:
+    job.update(phase='deleting schedule')
+    run_batches(cursor, '''
+      DELETE FROM word_schedule WHERE word_id IN (SELECT word_id FROM word_schedule LIMIT ?)
+    ''', (), batch_size, pause)
+
+# Recompute word_reviews (totals and last_reviewed) for the words in
+# reset_words from their remaining answers (recent and archived), `batch_size`
+# words per transaction, as rebuild_rollups.sql does for every word. With
+# reschedule=True their word_schedule is replayed from those answers too.
+# Words without answers are new again.
+def update_words(job, cursor, reschedule, batch_size, pause):
+  connection = cursor.connection
+  last_word_id = 0
+  updated = 0
+  while True:
+    cursor.execute('''
+      SELECT word_id FROM reset_words WHERE word_id > ? ORDER BY word_id LIMIT ?
+    ''', (last_word_id, batch_size))
+    word_ids = [row[0] for row in cursor.fetchall()]
+    if not word_ids:
+      break
+    last_word_id = word_ids[-1]
+    batch = json.dumps(word_ids)
+
+    try:
+      cursor.execute('BEGIN IMMEDIATE')
+      cursor.execute('''
+        UPDATE word_reviews SET correct_count = 0, wrong_count = 0, last_reviewed = NULL
+        WHERE word_id IN (SELECT value FROM json_each(?))
+          AND word_id NOT IN (SELECT word_id FROM word_mastery)
+      ''', (batch,))
+      cursor.execute('''
+        UPDATE word_reviews SET
+          correct_count = a.correct_count,
+          wrong_count = a.wrong_count,
+          last_reviewed = a.last_reviewed
+        FROM (
+          SELECT word_id, SUM(correct = 1) AS correct_count, SUM(correct = 0) AS wrong_count,
+                 datetime(MAX(created_at)) AS last_reviewed
+          FROM all_word_review_items
+          WHERE word_id IN (SELECT value FROM json_each(?))
+          GROUP BY word_id
+        ) a
+        WHERE a.word_id = word_reviews.word_id
+      ''', (batch,))
+      if reschedule:
+        cursor.execute('''
+          DELETE FROM word_schedule WHERE word_id IN (SELECT value FROM json_each(?))
+        ''', (batch,))
+        cursor.execute('''
+          SELECT word_id, correct, created_at FROM all_word_review_items
+          WHERE word_id IN (SELECT value FROM json_each(?))
+        ''', (batch,))
+        rows = [(row[0], bool(row[1]), row[2]) for row in cursor.fetchall()]
+        if rows:
+          schedule_reviews(cursor, rows)
+      connection.commit()
+    except Exception:
+      if connection.in_transaction:
+        connection.rollback()
+      raise
+
+    updated += len(word_ids)
+    job.update(words_updated=updated)
+    if len(word_ids) < batch_size:
+      break
+    time.sleep(pause)
+
+# The delete triggers count rollup rows down to zero but leave them in place;
+# drop those so the tables match what rebuild_rollups.sql would produce
+def drop_empty_rollups(cursor):
+  connection = cursor.connection
+  try:
+    cursor.execute('BEGIN IMMEDIATE')
+    cursor.execute('DELETE FROM daily_study_stats WHERE sessions_count = 0 AND reviews_count = 0')
+    cursor.execute('DELETE FROM daily_group_activity WHERE sessions_count = 0')
+    cursor.execute('''
+      DELETE FROM counters
+      WHERE name IN ('group_study_sessions', 'activity_study_sessions') AND value = 0
+    ''')
+    connection.commit()
+  except Exception:
+    if connection.in_transaction:
+      connection.rollback()
+    raise
+
+# Run a `DELETE ... LIMIT ?` statement one transaction at a time until it
+# deletes fewer than batch_size rows, sleeping `pause` seconds in between so
+# other writers get the lock
+def run_batches(cursor, statement, params, batch_size, pause, on_batch=None):
+  connection = cursor.connection
+  while True:
+    try:
+      cursor.execute('BEGIN IMMEDIATE')
+      cursor.execute(statement, params + (batch_size,))
+      deleted = cursor.rowcount
+      connection.commit()
+    except Exception:
+      if connection.in_transaction:
+        connection.rollback()
+      raise
+
+    if on_batch is not None:
+      on_batch(deleted)
+    if deleted < batch_size:
+      return
+    time.sleep(pause)
+
+# Full wipe: drop the history tables and recreate them (with their indexes
+# and triggers) from the schema SQLite keeps in sqlite_master. Dropping skips
+# the per-row delete triggers, so the change versions and due dates they
+# would have maintained are updated here; the caller rebuilds the rollups.
+def recreate_history_tables(job, cursor):
+  connection = cursor.connection
+  placeholders = ', '.join('?' for _ in HISTORY_TABLES)
+  try:
+    cursor.execute('BEGIN IMMEDIATE')
+    cursor.execute(f'''
+      SELECT type, sql FROM sqlite_master
+      WHERE tbl_name IN ({placeholders}) AND sql IS NOT NULL
+      ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END
+    ''', HISTORY_TABLES)
+    schema = cursor.fetchall()
+
+    cursor.execute('''
+      SELECT (SELECT COUNT(*) FROM word_review_items) + (SELECT COUNT(*) FROM word_review_items_archive),
+             (SELECT COUNT(*) FROM study_sessions)
+    ''')
+    review_items, study_sessions = cursor.fetchone()
+
+    for table in HISTORY_TABLES:
+      cursor.execute(f'DROP TABLE IF EXISTS {table}')
+    for row in schema:
+      cursor.execute(row['sql'])
+
+    cursor.execute('UPDATE word_groups SET next_due_at = ? WHERE next_due_at <> ?', (UNSCHEDULED, UNSCHEDULED))
+    cursor.execute('''
+      UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+      WHERE name IN ('study_sessions', 'word_review_items')
+    ''')
+    connection.commit()
+  except Exception:
+    if connection.in_transaction:
+      connection.rollback()
+    raise
+
+  job.update(review_items_deleted=review_items, study_sessions_deleted=study_sessions)
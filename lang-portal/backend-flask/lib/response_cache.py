@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+
+# In-process LRU cache for GET responses.
+#
+# Entries are keyed by route + normalized query args and tagged with the
+# tables the response was built from (the same tables passed to
+# @conditional). Write paths call Db.invalidate(<tables>) to drop exactly the
+# entries that depend on what they changed. The TTL bounds how stale an entry
+# can get when another process writes to the database.
+#
+# A response built while a write commits can hold the data from before it.
+# Callers take generation(tables) before building the response and pass it to
+# set(); every invalidate() (and clear()) bumps the generations, so set()
+# discards a body whose tables were invalidated in the meantime.
+
+class CacheEntry:
+  def __init__(self, body, status, content_type, etag, last_modified, expires_at):
+    self.body = body
+    self.status = status
+    self.content_type = content_type
+    self.etag = etag
+    self.last_modified = last_modified
+    self.expires_at = expires_at
+    self.compressed = {}  # Content-Encoding -> compressed body (lib/compression.py)
+
+class ResponseCache:
+  def __init__(self, max_entries=512, ttl=60):
+    self.max_entries = max_entries
+    self.ttl = ttl
+    self.entries = OrderedDict()  # key -> CacheEntry, least recently used first
+    self.tags = {}                # table -> set of keys
+    self.entry_tags = {}          # key -> tables
+    self.generations = {}         # table -> number of invalidations
+    self.clears = 0
+    self.lock = threading.Lock()
+
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+    self.invalidations = 0
+    self.discarded = 0
+
+  @property
+  def enabled(self):
+    return self.max_entries > 0
+
+  def get(self, key):
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is None:
+        self.misses += 1
+        return None
+      if entry.expires_at <= time.monotonic():
+        self._remove(key)
+        self.expirations += 1
+        self.misses += 1
+        return None
+      self.entries.move_to_end(key)
+      self.hits += 1
+      return entry
+
+  # Snapshot to pass to set() for a response built from these tables
+  def generation(self, tables):
+    with self.lock:
+      return self._generation(tables)
+
+  # Store a response; with `generation` (see above), only if none of its
+  # tables was invalidated since that snapshot. Returns the entry or None.
+  def set(self, key, tables, body, status, content_type, etag=None, last_modified=None,
+          generation=None):
+    if not self.enabled:
+      return None
+    entry = CacheEntry(body, status, content_type, etag, last_modified, time.monotonic() + self.ttl)
+    with self.lock:
+      if generation is not None and generation != self._generation(tables):
+        self.discarded += 1
+        return None
+      if key in self.entries:
+        self._remove(key)
+      self.entries[key] = entry
+      self.entry_tags[key] = tables
+      for table in tables:
+        self.tags.setdefault(table, set()).add(key)
+
+      # Evict least recently used entries beyond the size bound
+      while len(self.entries) > self.max_entries:
+        oldest = next(iter(self.entries))
+        self._remove(oldest)
+        self.evictions += 1
+    return entry
+
+  # Drop every entry that depends on any of these tables
+  def invalidate(self, *tables):
+    with self.lock:
+      for table in tables:
+        self.generations[table] = self.generations.get(table, 0) + 1
+        for key in list(self.tags.get(table, ())):
+          self._remove(key)
+          self.invalidations += 1
+
+  def clear(self):
+    with self.lock:
+      self.clears += 1
+      self.entries.clear()
+      self.tags.clear()
+      self.entry_tags.clear()
+
+  def stats(self):
+    with self.lock:
+      return {
+        "entries": len(self.entries),
+        "max_entries": self.max_entries,
+        "ttl": self.ttl,
+        "hits": self.hits,
+        "misses": self.misses,
+        "evictions": self.evictions,
+        "expirations": self.expirations,
+        "invalidations": self.invalidations,
+        "discarded": self.discarded
+      }
+
+  # Caller must hold the lock
+  def _generation(self, tables):
+    return (self.clears, tuple(self.generations.get(table, 0) for table in tables))
+
+  # Caller must hold the lock
+  def _remove(self, key):
+    self.entries.pop(key, None)
+    for table in self.entry_tags.pop(key, ()):
+      keys = self.tags.get(table)
+      if keys is not None:
+        keys.discard(key)
+        if not keys:
+          del self.tags[table]
@@ -0,0 +1,150 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from lib.reviews import record_review_items
+
+# Write-behind queue for review results.
+#
+# Requests validate their review items and append them to an in-memory queue;
+# a single writer thread drains it into word_review_items/word_reviews, one
+# transaction per flush (every flush_interval_ms or flush_size events,
+# whichever comes first). With one writer there is no contention for SQLite's
+# write lock between request threads.
+#
+# The queue is bounded by the number of pending events: submit() blocks for
+# up to `timeout` seconds for room and then raises QueueFull so the route can
+# answer 503. Clients that need durability wait for their batch's commit.
+
+logger = logging.getLogger('lang_portal.review_queue')
+
+class QueueFull(Exception):
+  pass
+
+class ReviewBatch:
+  def __init__(self, study_session_id, rows):
+    self.study_session_id = study_session_id
+    self.rows = rows
+    self.done = threading.Event()
+    self.error = None
+
+  # Wait until the batch is committed (or failed); False on timeout
+  def wait(self, timeout=None):
+    return self.done.wait(timeout)
+
+class ReviewWriter:
+  def __init__(self, db, capacity=10000, flush_interval_ms=50, flush_size=500):
+    self.db = db
+    self.capacity = capacity
+    self.flush_interval = flush_interval_ms / 1000.0
+    self.flush_size = flush_size
+
+    self.queue = queue.Queue()
+    self.pending = 0  # Events queued but not yet written
+    self.condition = threading.Condition()
+    self.thread = None
+    self.stopped = False
+
+  def start(self):
+    if self.thread is None:
+      self.thread = threading.Thread(target=self.run, name='review-writer', daemon=True)
+      self.thread.start()
+      atexit.register(self.stop)
+    return self
+
+  # Queue rows for a session. Blocks up to `timeout` seconds while the queue
+  # is full, then raises QueueFull.
+  def submit(self, study_session_id, rows, timeout=None):
+    with self.condition:
+      has_room = self.condition.wait_for(
+        lambda: self.pending == 0 or self.pending + len(rows) <= self.capacity,
+        timeout
+      )
+      if not has_room or self.stopped:
+        raise QueueFull('Review queue is full')
+      self.pending += len(rows)
+
+    batch = ReviewBatch(study_session_id, rows)
+    self.queue.put(batch)
+    return batch
+
+  # Wait until everything queued so far has been written
+  def flush(self, timeout=None):
+    marker = ReviewBatch(None, [])
+    self.queue.put(marker)
+    return marker.wait(timeout)
+
+  # Flush-on-shutdown: write what is queued, then stop the writer thread
+  def stop(self, timeout=10):
+    if self.thread is None or self.stopped:
+      return
+    self.flush(timeout)
+    self.stopped = True
+    self.queue.put(None)
+    self.thread.join(timeout)
+
+  def stats(self):
+    with self.condition:
+      return {"pending_events": self.pending, "capacity": self.capacity}
+
+  def run(self):
+    connection = self.db.connect()
+    try:
+      while True:
+        batch = self.queue.get()
+        if batch is None:
+          return
+
+        # Group everything that arrives within the flush window
+        batches = [batch]
+        events = len(batch.rows)
+        deadline = time.monotonic() + self.flush_interval
+        while events < self.flush_size:
+          remaining = deadline - time.monotonic()
+          if remaining <= 0:
+            break
+          try:
+            batch = self.queue.get(timeout=remaining)
+          except queue.Empty:
+            break
+          if batch is None:
+            self.queue.put(None)  # Stop after this flush
+            break
+          batches.append(batch)
+          events += len(batch.rows)
+
+        self.write(connection, batches)
+    finally:
+      connection.close()
+
+  def write(self, connection, batches):
+    writes = [batch for batch in batches if batch.rows]
+    try:
+      if writes:
+        cursor = connection.cursor()
+        for batch in writes:
+          record_review_items(cursor, batch.study_session_id, batch.rows)
+        connection.commit()
+    except Exception:
+      connection.rollback()
+      # Retry batch by batch so one bad batch does not fail the others
+      for batch in writes:
+        try:
+          record_review_items(connection.cursor(), batch.study_session_id, batch.rows)
+          connection.commit()
+        except Exception as e:
+          connection.rollback()
+          batch.error = e
+          logger.exception('Failed to write %d review items for session %s',
+                           len(batch.rows), batch.study_session_id)
+
+    if writes:
+      self.db.invalidate('word_review_items', 'word_reviews', 'study_sessions')
+
+    with self.condition:
+      self.pending -= sum(len(batch.rows) for batch in writes)
+      self.condition.notify_all()
+    for batch in batches:
+      batch.done.set()
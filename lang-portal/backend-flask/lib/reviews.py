@@ -0,0 +1,106 @@
+import json
+from datetime import datetime
+
+from lib.scheduler import schedule_reviews, parse_timestamp, format_timestamp
+
+# Set-based ingestion of review results (POST /api/study-sessions/<id>/review).
+#
+# A batch costs a constant number of statements no matter how many items it
+# has: one word id lookup, one executemany into word_review_items, one
+# executemany upsert into word_reviews with the deltas pre-aggregated per word
+# and the SM-2 schedule update (lib/scheduler.py).
+
+# Parse and validate review items. Returns (rows, errors) where rows are
+# (word_id, correct, created_at) tuples for the valid items and errors is a
+# list of {"index", "error"} for the rejected ones.
+def validate_review_items(cursor, review_items):
+  errors = []
+  candidates = []
+  default_created_at = datetime.utcnow()  # Use current time if not provided.
+
+  for index, item in enumerate(review_items):
+    if not isinstance(item, dict):
+      errors.append({"index": index, "error": "Each review item must be an object"})
+      continue
+
+    word_id = item.get('word_id')
+    correct = item.get('correct')
+
+    # Basic validation
+    if word_id is None or correct is None:
+      errors.append({"index": index, "error": "Each review item must have word_id and correct"})
+      continue
+    if not isinstance(correct, bool):
+      errors.append({"index": index, "error": "correct must be a boolean"})
+      continue
+    # ASCII digits only: str.isdigit() also accepts e.g. '²', which int() rejects
+    if isinstance(word_id, str) and word_id.isascii() and word_id.isdecimal():
+      word_id = int(word_id)
+    if not isinstance(word_id, int) or isinstance(word_id, bool):
+      errors.append({"index": index, "error": "word_id must be an integer"})
+      continue
+
+    created_at = item.get('created_at')
+    if created_at is None:
+      created_at = default_created_at
+    else:
+      # Stored as UTC like CURRENT_TIMESTAMP so date() rollups use the same day
+      try:
+        created_at = parse_timestamp(created_at)
+      except ValueError:
+        errors.append({"index": index, "error": "created_at must be an ISO 8601 timestamp"})
+        continue
+
+    candidates.append((index, word_id, correct, created_at))
+
+  # Check that the words exist with a single lookup. Important for data integrity.
+  word_ids = sorted({word_id for _, word_id, _, _ in candidates})
+  cursor.execute('''
+    SELECT id FROM words WHERE id IN (SELECT value FROM json_each(?))
+  ''', (json.dumps(word_ids),))
+  known_ids = {row[0] for row in cursor.fetchall()}
+
+  rows = []
+  for index, word_id, correct, created_at in candidates:
+    if word_id not in known_ids:
+      errors.append({"index": index, "error": f"Word with id {word_id} not found"})
+      continue
+    rows.append((word_id, correct, created_at))
+
+  errors.sort(key=lambda error: error["index"])
+  return rows, errors
+
+# Insert validated rows, apply their per-word deltas to word_reviews and
+# reschedule the words.
+# The caller owns the transaction (commit/rollback).
+def record_review_items(cursor, study_session_id, rows):
+  cursor.executemany('''
+    INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+    VALUES (?, ?, ?, ?)
+  ''', [(word_id, study_session_id, int(correct), created_at) for word_id, correct, created_at in rows])
+
+  # Pre-aggregate correct/wrong deltas and the latest answer so each word is
+  # upserted once. last_reviewed is the newest answer's created_at, which is
+  # what rebuild_rollups.sql recomputes.
+  deltas = {}
+  for word_id, correct, created_at in rows:
+    correct_count, wrong_count, last_reviewed = deltas.get(word_id, (0, 0, ''))
+    last_reviewed = max(last_reviewed, format_timestamp(parse_timestamp(created_at)))
+    if correct:
+      deltas[word_id] = (correct_count + 1, wrong_count, last_reviewed)
+    else:
+      deltas[word_id] = (correct_count, wrong_count + 1, last_reviewed)
+
+  cursor.executemany('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(word_id) DO UPDATE SET
+    correct_count = correct_count + excluded.correct_count,
+    wrong_count = wrong_count + excluded.wrong_count,
+    last_reviewed = CASE
+      WHEN last_reviewed IS NULL OR excluded.last_reviewed > last_reviewed THEN excluded.last_reviewed
+      ELSE last_reviewed
+    END
+  ''', [(word_id, *delta) for word_id, delta in deltas.items()])
+
+  schedule_reviews(cursor, rows)
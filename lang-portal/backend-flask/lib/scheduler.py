@@ -0,0 +1,98 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+# SM-2 spaced-repetition scheduling for review results.
+#
+# Review answers are binary, so a correct answer is graded as quality 4
+# ("correct after hesitation") and a wrong one as quality 1. Every answer
+# moves the word's state forward:
+#
+#   correct  interval 1 day, then 6 days, then interval * ease
+#   wrong    repetitions reset, interval back to 1 day
+#   ease     ease + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02), at least 1.3
+#
+# Intervals are capped at MAX_INTERVAL_DAYS; without a cap a long run of
+# correct answers grows them past what a datetime can hold.
+#
+# State lives in word_schedule (see 0011_add_word_schedule.sql); triggers copy
+# next_due_at to word_groups for GET /api/groups/<id>/due.
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_INTERVAL_DAYS = 36500
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def format_timestamp(value):
+  return value.strftime(TIMESTAMP_FORMAT)
+
+# created_at of a review item (a datetime or an ISO 8601 string) as a naive
+# UTC datetime. Raises ValueError for anything else.
+def parse_timestamp(value):
+  if not isinstance(value, datetime):
+    if not isinstance(value, str):
+      raise ValueError('created_at must be an ISO 8601 timestamp')
+    value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+  if value.tzinfo is not None:
+    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+  return value
+
+# Apply one answer to (repetitions, interval_days, ease)
+def review(repetitions, interval_days, ease, correct):
+  quality = CORRECT_QUALITY if correct else WRONG_QUALITY
+  if quality >= 3:
+    if repetitions == 0:
+      interval_days = 1
+    elif repetitions == 1:
+      interval_days = 6
+    else:
+      interval_days = min(MAX_INTERVAL_DAYS, round(interval_days * ease, 2))
+    repetitions += 1
+  else:
+    repetitions = 0
+    interval_days = 1
+
+  ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+  return repetitions, interval_days, ease
+
+# Update word_schedule for (word_id, correct, created_at) rows. Costs one
+# lookup of the current state and one executemany upsert per batch.
+# The caller owns the transaction.
+def schedule_reviews(cursor, rows):
+  word_ids = sorted({word_id for word_id, _, _ in rows})
+  cursor.execute('''
+    SELECT word_id, repetitions, interval_days, ease, last_reviewed_at
+    FROM word_schedule
+    WHERE word_id IN (SELECT value FROM json_each(?))
+  ''', (json.dumps(word_ids),))
+  states = {
+    row['word_id']: (row['repetitions'], row['interval_days'], row['ease'], row['last_reviewed_at'])
+    for row in cursor.fetchall()
+  }
+
+  # Answers are applied in the order they were given
+  answers = sorted(((parse_timestamp(created_at), word_id, correct) for word_id, correct, created_at in rows),
+                   key=lambda answer: answer[0])
+  for reviewed_at, word_id, correct in answers:
+    repetitions, interval_days, ease, _ = states.get(word_id, (0, 0, DEFAULT_EASE, None))
+    repetitions, interval_days, ease = review(repetitions, interval_days, ease, correct)
+    states[word_id] = (repetitions, interval_days, ease, format_timestamp(reviewed_at))
+
+  updates = []
+  for word_id in word_ids:
+    repetitions, interval_days, ease, last_reviewed_at = states[word_id]
+    next_due_at = datetime.strptime(last_reviewed_at, TIMESTAMP_FORMAT) + timedelta(days=interval_days)
+    updates.append((word_id, repetitions, interval_days, ease, last_reviewed_at, format_timestamp(next_due_at)))
+
+  cursor.executemany('''
+    INSERT INTO word_schedule (word_id, repetitions, interval_days, ease, last_reviewed_at, next_due_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(word_id) DO UPDATE SET
+    repetitions = excluded.repetitions,
+    interval_days = excluded.interval_days,
+    ease = excluded.ease,
+    last_reviewed_at = excluded.last_reviewed_at,
+    next_due_at = excluded.next_due_at
+  ''', updates)
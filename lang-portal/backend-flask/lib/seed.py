@@ -0,0 +1,78 @@
+import hashlib
+import json
+
+# Helpers for importing seed/vocabulary files.
+
+# Identity of a word for de-duplication on import. Two entries with the same
+# kanji, romaji and english are the same word; their parts may be updated.
+def content_hash(kanji, romaji, english):
+  key = '\x1f'.join((kanji or '', romaji or '', english or ''))
+  return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+# Yield the objects of a top-level JSON array one at a time, reading the file
+# in chunks so memory use does not depend on the size of the file.
+def iter_json_array(path, chunk_size=65536):
+  decoder = json.JSONDecoder()
+
+  with open(path, 'r', encoding='utf-8') as file:
+    buffer = ''
+    position = 0
+
+    # Read another chunk, dropping what has already been consumed
+    def fill():
+      nonlocal buffer, position
+      chunk = file.read(chunk_size)
+      if not chunk:
+        return False
+      buffer = buffer[position:] + chunk
+      position = 0
+      return True
+
+    # Next non-whitespace character ('' at end of file)
+    def peek():
+      nonlocal position
+      while True:
+        while position < len(buffer) and buffer[position].isspace():
+          position += 1
+        if position < len(buffer):
+          return buffer[position]
+        if not fill():
+          return ''
+
+    if peek() != '[':
+      raise ValueError(f"{path}: expected a JSON array")
+    position += 1
+
+    first = True
+    while True:
+      char = peek()
+      if char == ']':
+        return
+      if not first:
+        if char != ',':
+          raise ValueError(f"{path}: expected ',' or ']' at offset {position}")
+        position += 1
+        peek()
+
+      # Decode the next item, reading more of the file until it is complete
+      while True:
+        try:
+          item, position = decoder.raw_decode(buffer, position)
+          break
+        except json.JSONDecodeError:
+          if not fill():
+            raise
+
+      first = False
+      yield item
+
+# Split an iterable into lists of at most `size` items
+def batched(iterable, size):
+  batch = []
+  for item in iterable:
+    batch.append(item)
+    if len(batch) >= size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
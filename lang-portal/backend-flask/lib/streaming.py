@@ -0,0 +1,47 @@
+import json
+from flask import Response, request, stream_with_context
+
+# Streaming JSON / NDJSON responses built straight from a cursor.
+#
+# Rows are fetched with fetchmany() and rendered batch by batch, so memory
+# stays constant and the first bytes go out before the query has finished.
+# The request context (and its pooled connection) is kept until the
+# generator is exhausted.
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# True when the client asked for newline-delimited JSON
+def wants_ndjson():
+  best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+  return best == NDJSON_MIMETYPE
+
+# True when the client asked for a streamed response (?stream=1 or NDJSON)
+def wants_stream():
+  return request.args.get('stream') in ('1', 'true') or wants_ndjson()
+
+# Render a value as a compact JSON fragment
+def dumps(value):
+  return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+# Stream every remaining row of `cursor`, rendered to a JSON string by
+# `render`, either as one JSON array or as NDJSON (one object per line)
+def stream_rows(cursor, render, ndjson=False, batch_size=500):
+  def generate():
+    first = True
+    if not ndjson:
+      yield '['
+    while True:
+      rows = cursor.fetchmany(batch_size)
+      if not rows:
+        break
+      if ndjson:
+        yield ''.join(render(row) + '\n' for row in rows)
+      else:
+        chunk = ','.join(render(row) for row in rows)
+        yield chunk if first else ',' + chunk
+        first = False
+    if not ndjson:
+      yield ']'
+
+  mimetype = NDJSON_MIMETYPE if ndjson else 'application/json'
+  return Response(stream_with_context(generate()), mimetype=mimetype)
@@ -0,0 +1,91 @@
+import hmac
+import os
+from datetime import datetime
+from functools import wraps
+from flask import current_app, request, jsonify
+from flask_cors import cross_origin
+
+from lib.backup import backup_database, prune_backups
+from lib.jobs import JobRunning
+
+# Admin routes are off unless ADMIN_TOKEN is set, and then need
+# "Authorization: Bearer <ADMIN_TOKEN>"
+def admin_required(view):
+  @wraps(view)
+  def wrapper(*args, **kwargs):
+    token = current_app.config['ADMIN_TOKEN']
+    if not token:
+      return jsonify({"error": "Not found"}), 404
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+      return jsonify({"error": "Unauthorized"}), 401
+    return view(*args, **kwargs)
+  return wrapper
+
+def load(app):
+  # Response cache counters (hits, misses, evictions, ...) for this process
+  @app.route('/api/admin/cache', methods=['GET'])
+  @cross_origin()
+  @admin_required
+  def get_cache_stats():
+    return jsonify(app.response_cache.stats())
+
+  # Drop every cached response in this process
+  @app.route('/api/admin/cache', methods=['DELETE'])
+  @cross_origin()
+  @admin_required
+  def clear_cache():
+    app.response_cache.clear()
+    return jsonify({"message": "Response cache cleared"}), 200
+
+  # Snapshot the live database into BACKUP_DIR in the background (see
+  # lib/backup.py), keeping the newest BACKUP_KEEP snapshots. Body:
+  # {"compress": true, "verify": false}, both optional. Poll the returned job
+  # at GET /api/jobs/<job_id>.
+  @app.route('/api/admin/backup', methods=['POST'])
+  @cross_origin()
+  @admin_required
+  def create_backup():
+    try:
+      data = request.get_json(silent=True) or {}
+      compress = request.args.get('compress') in ('1', 'true') or data.get('compress') is True
+      verify = not (request.args.get('verify') in ('0', 'false') or data.get('verify') is False)
+
+      filename = 'words-' + datetime.utcnow().strftime('%Y%m%d-%H%M%S') + ('.db.gz' if compress else '.db')
+      path = os.path.join(app.config['BACKUP_DIR'], filename)
+
+      try:
+        job = app.jobs.submit(
+          'backup', run_backup, path,
+          compress=compress,
+          verify=verify,
+          params={"path": path, "compress": compress, "verify": verify},
+          exclusive=True
+        )
+      except JobRunning as e:
+        return jsonify({"error": str(e), "job_id": e.job.id, "status_url": f"/api/jobs/{e.job.id}"}), 409
+
+      response = jsonify({
+        "message": "Backup started",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}"
+      })
+      response.headers['Location'] = f"/api/jobs/{job.id}"
+      return response, 202
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  def run_backup(job, path, compress, verify):
+    source = app.db.connect()
+    try:
+      summary = backup_database(
+        source, path,
+        pages=app.config['BACKUP_PAGES'],
+        compress=compress,
+        verify=verify,
+        progress=lambda copied, total: job.update(pages_copied=copied, pages_total=total)
+      )
+    finally:
+      source.close()
+    summary["removed"] = prune_backups(app.config['BACKUP_DIR'], app.config['BACKUP_KEEP'])
+    return summary
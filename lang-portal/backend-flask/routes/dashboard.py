@@ -2,9 +2,12 @@ from flask import jsonify
 from flask_cors import cross_origin
 from datetime import datetime, timedelta
 
+from lib.conditional import conditional
+
 def load(app):
     @app.route('/dashboard/recent-session', methods=['GET'])
     @cross_origin()
+    @conditional('study_sessions', 'study_activities')
     def get_recent_session():
         try:
             cursor = app.db.cursor()
@@ -16,12 +19,10 @@ def load(app):
                     ss.group_id,
                     sa.name as activity_name,
                     ss.created_at,
-                    COUNT(CASE WHEN wri.correct = 1 THEN 1 END) as correct_count,
-                    COUNT(CASE WHEN wri.correct = 0 THEN 1 END) as wrong_count
+                    ss.correct_count,
+                    ss.wrong_count
                 FROM study_sessions ss
                 JOIN study_activities sa ON ss.study_activity_id = sa.id
-                LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-                GROUP BY ss.id
                 ORDER BY ss.created_at DESC
                 LIMIT 1
             ''')
@@ -45,85 +46,56 @@ def load(app):
 
     @app.route('/dashboard/stats', methods=['GET'])
     @cross_origin()
+    @conditional('words', 'study_sessions', 'word_review_items', 'word_reviews', per_day=True)
     def get_study_stats():
         try:
             cursor = app.db.cursor()
             
-            # Get total vocabulary count
-            cursor.execute('SELECT COUNT(*) as total_vocabulary FROM words')
-            total_vocabulary = cursor.fetchone()["total_vocabulary"]
+            # Get total vocabulary count (trigger-maintained counter)
+            total_vocabulary = app.db.count('words')
 
-            # Get total unique words studied
-            cursor.execute('''
-                SELECT COUNT(DISTINCT word_id) as total_words
-                FROM word_review_items wri
-                JOIN study_sessions ss ON wri.study_session_id = ss.id
-            ''')
-            total_words = cursor.fetchone()["total_words"]
+            # Get total unique words studied (rows in the word_mastery rollup)
+            total_words = app.db.count('words_studied')
             
-            # Get mastered words (words with >80% success rate and at least 5 attempts)
+            # Get mastered words (words with >80% success rate and at least 5
+            # attempts), counted through the word_reviews mastery_state index
             cursor.execute('''
-                WITH word_stats AS (
-                    SELECT 
-                        word_id,
-                        COUNT(*) as total_attempts,
-                        SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
-                    FROM word_review_items wri
-                    JOIN study_sessions ss ON wri.study_session_id = ss.id
-                    GROUP BY word_id
-                    HAVING total_attempts >= 5
-                )
                 SELECT COUNT(*) as mastered_words
-                FROM word_stats
-                WHERE success_rate >= 0.8
+                FROM word_reviews
+                WHERE mastery_state = 'mastered'
             ''')
             mastered_words = cursor.fetchone()["mastered_words"]
             
             # Get overall success rate
-            cursor.execute('''
-                SELECT 
-                    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
-                FROM word_review_items wri
-                JOIN study_sessions ss ON wri.study_session_id = ss.id
-            ''')
-            success_rate = cursor.fetchone()["success_rate"] or 0
+            review_items = app.db.count('review_items')
+            review_items_correct = app.db.count('review_items_correct')
+            success_rate = review_items_correct * 1.0 / review_items if review_items else 0
             
-            # Get total number of study sessions
-            cursor.execute('SELECT COUNT(*) as total_sessions FROM study_sessions')
-            total_sessions = cursor.fetchone()["total_sessions"]
+            # Get total number of study sessions (trigger-maintained counter)
+            total_sessions = app.db.count('study_sessions')
             
             # Get number of groups with activity in the last 30 days
             cursor.execute('''
                 SELECT COUNT(DISTINCT group_id) as active_groups
-                FROM study_sessions
-                WHERE created_at >= date('now', '-30 days')
+                FROM daily_group_activity
+                WHERE study_date >= date('now', '-30 days') AND sessions_count > 0
             ''')
             active_groups = cursor.fetchone()["active_groups"]
             
-            # Calculate current streak (consecutive days with at least one study session)
+            # Current and longest streak (consecutive days with at least one
+            # study session), kept up to date by a trigger on study_sessions.
+            # The current streak is broken once a full day passes without study.
             cursor.execute('''
-                WITH daily_sessions AS (
-                    SELECT 
-                        date(created_at) as study_date,
-                        COUNT(*) as session_count
-                    FROM study_sessions
-                    GROUP BY date(created_at)
-                ),
-                streak_calc AS (
-                    SELECT 
-                        study_date,
-                        julianday(study_date) - julianday(lag(study_date, 1) over (order by study_date)) as days_diff
-                    FROM daily_sessions
-                )
-                SELECT COUNT(*) as streak
-                FROM (
-                    SELECT study_date
-                    FROM streak_calc
-                    WHERE days_diff = 1 OR days_diff IS NULL
-                    ORDER BY study_date DESC
-                )
+                SELECT
+                    CASE WHEN last_study_date >= date('now', '-1 day')
+                         THEN current_streak ELSE 0 END as current_streak,
+                    longest_streak
+                FROM study_streak
+                WHERE id = 1
             ''')
-            current_streak = cursor.fetchone()["streak"]
+            streak = cursor.fetchone()
+            current_streak = streak["current_streak"] if streak else 0
+            longest_streak = streak["longest_streak"] if streak else 0
             
             return jsonify({
                 "total_vocabulary": total_vocabulary,
@@ -132,7 +104,8 @@ def load(app):
                 "success_rate": success_rate,
                 "total_sessions": total_sessions,
                 "active_groups": active_groups,
-                "current_streak": current_streak
+                "current_streak": current_streak,
+                "longest_streak": longest_streak
             })
             
         except Exception as e:
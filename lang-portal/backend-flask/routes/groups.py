@@ -1,10 +1,25 @@
-from flask import request, jsonify, g
+from flask import Response, request, jsonify, g
 from flask_cors import cross_origin
 import json
+from datetime import datetime
+
+from lib.pagination import keyset_clause, decode_cursor, next_cursor
+from lib.streaming import stream_rows, wants_stream, wants_ndjson
+from lib.json_provider import negotiated_format
+from lib.conditional import conditional
+from lib.scheduler import format_timestamp
+from routes.words import SORT_COLUMNS
+
+# Largest batch GET /api/groups/<id>/due returns
+MAX_DUE_LIMIT = 500
+
+# word_groups.next_due_at of words that were never reviewed
+UNSCHEDULED = '1970-01-01 00:00:00'
 
 def load(app):
   @app.route('/api/groups', methods=['GET'])
   @cross_origin()
+  @conditional('groups')
   def get_groups():
     try:
       cursor = app.db.cursor()
@@ -35,9 +50,8 @@ def load(app):
 
       groups = cursor.fetchall()
 
-      # Query the total number of groups
-      cursor.execute('SELECT COUNT(*) FROM groups')
-      total_groups = cursor.fetchone()[0]
+      # Total number of groups (trigger-maintained counter)
+      total_groups = app.db.count('groups')
       total_pages = (total_groups + groups_per_page - 1) // groups_per_page
 
       # Format the response
@@ -60,6 +74,7 @@ def load(app):
 
   @app.route('/api/groups/<int:id>', methods=['GET'])
   @cross_origin()
+  @conditional('groups')
   def get_group(id):
     try:
       cursor = app.db.cursor()
@@ -83,8 +98,10 @@ def load(app):
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
+  # Supports the same ?page=N and ?cursor=TOKEN pagination modes as /api/words
   @app.route('/api/groups/<int:id>/words', methods=['GET'])
   @cross_origin()
+  @conditional('groups', 'words', 'word_groups', 'word_reviews')
   def get_group_words(id):
     try:
       cursor = app.db.cursor()
@@ -104,35 +121,54 @@ def load(app):
         sort_by = 'kanji'
       if order not in ['asc', 'desc']:
         order = 'asc'
+      sort_column, id_column = SORT_COLUMNS[sort_by]
 
       # First, check if the group exists
-      cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
+      cursor.execute('SELECT name, words_count FROM groups WHERE id = ?', (id,))
       group = cursor.fetchone()
       if not group:
         return jsonify({"error": "Group not found"}), 404
 
-      # Query to fetch words with pagination and sorting
-      cursor.execute(f'''
-        SELECT w.*, 
-               COALESCE(wr.correct_count, 0) as correct_count,
-               COALESCE(wr.wrong_count, 0) as wrong_count
-        FROM words w
-        JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN word_reviews wr ON w.id = wr.word_id
-        WHERE wg.group_id = ?
-        ORDER BY {sort_by} {order}
-        LIMIT ? OFFSET ?
-      ''', (id, words_per_page, offset))
+      page_cursor = request.args.get('cursor')
+      if page_cursor is not None:
+        # Keyset mode: seek past the last row of the previous page
+        where, order_by = keyset_clause(sort_column, id_column, order)
+        params = []
+        if page_cursor:
+          try:
+            params = list(decode_cursor(page_cursor, sort_by, order))
+          except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        else:
+          where = '1'
+
+        cursor.execute(f'''
+          SELECT w.*, r.correct_count, r.wrong_count
+          FROM words w
+          JOIN word_groups wg ON w.id = wg.word_id
+          JOIN word_reviews r ON w.id = r.word_id
+          WHERE wg.group_id = ? AND {where}
+          ORDER BY {order_by}
+          LIMIT ?
+        ''', (id, *params, words_per_page + 1))
+      else:
+        # Query to fetch words with pagination and sorting
+        cursor.execute(f'''
+          SELECT w.*, r.correct_count, r.wrong_count
+          FROM words w
+          JOIN word_groups wg ON w.id = wg.word_id
+          JOIN word_reviews r ON w.id = r.word_id
+          WHERE wg.group_id = ?
+          ORDER BY {sort_column} {order}, {id_column} {order}
+          LIMIT ? OFFSET ?
+        ''', (id, words_per_page + 1, offset))
       
       words = cursor.fetchall()
+      has_more = len(words) > words_per_page
+      words = words[:words_per_page]
 
-      # Get total words count for pagination
-      cursor.execute('''
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = ?
-      ''', (id,))
-      total_words = cursor.fetchone()[0]
+      # Total words in the group (counter cache kept by a trigger on word_groups)
+      total_words = group["words_count"]
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
       # Format the response
@@ -147,17 +183,21 @@ def load(app):
           "wrong_count": word["wrong_count"]
         })
 
-      return jsonify({
+      response = {
         'words': words_data,
-        'total_pages': total_pages,
-        'current_page': page
-      })
+        'next_cursor': next_cursor(words, has_more, sort_by, order)
+      }
+      if page_cursor is None:
+        response['total_pages'] = total_pages
+        response['current_page'] = page
+      return jsonify(response)
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
 
   @app.route('/api/groups/<int:id>/study_sessions', methods=['GET'])
   @cross_origin()
+  @conditional('study_sessions', 'study_activities', 'groups')
   def get_group_study_sessions(id):
     try:
       cursor = app.db.cursor()
@@ -173,44 +213,33 @@ def load(app):
 
       # Map frontend sort keys to database columns
       sort_mapping = {
-        'startTime': 'created_at',
-        'endTime': 'last_activity_time',
+        'startTime': 's.created_at',
+        'endTime': 's.ended_at',
         'activityName': 'a.name',
         'groupName': 'g.name',
-        'reviewItemsCount': 'review_count'
+        'reviewItemsCount': 's.review_count'
       }
 
       # Use mapped sort column or default to created_at
-      sort_column = sort_mapping.get(sort_by, 'created_at')
+      sort_column = sort_mapping.get(sort_by, 's.created_at')
+      if order not in ['asc', 'desc']:
+        order = 'desc'
 
-      # Get total count for pagination
-      cursor.execute('''
-        SELECT COUNT(*)
-        FROM study_sessions
-        WHERE group_id = ?
-      ''', (id,))
-      total_sessions = cursor.fetchone()[0]
+      # Total sessions for this group (trigger-maintained counter)
+      total_sessions = app.db.count('group_study_sessions', id)
       total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
 
-      # Get study sessions for this group with dynamic calculations
+      # Get study sessions for this group with their stored summaries
       cursor.execute(f'''
         SELECT 
           s.id,
           s.group_id,
           s.study_activity_id,
           s.created_at as start_time,
-          (
-            SELECT MAX(created_at)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as last_activity_time,
+          s.ended_at as end_time,
           a.name as activity_name,
           g.name as group_name,
-          (
-            SELECT COUNT(*)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as review_count
+          s.review_count
         FROM study_sessions s
         JOIN study_activities a ON s.study_activity_id = a.id
         JOIN groups g ON s.group_id = g.id
@@ -223,11 +252,7 @@ def load(app):
       sessions_data = []
       
       for session in sessions:
-        # If there's no last_activity_time, use start_time + 30 minutes
-        end_time = session["last_activity_time"]
-        if not end_time:
-            end_time = cursor.execute('SELECT datetime(?, "+30 minutes")', (session["start_time"],)).fetchone()[0]
-        
+        # ended_at is the last review, or start_time + 30 minutes without reviews
         sessions_data.append({
           "id": session["id"],
           "group_id": session["group_id"],
@@ -235,7 +260,7 @@ def load(app):
           "study_activity_id": session["study_activity_id"],
           "activity_name": session["activity_name"],
           "start_time": session["start_time"],
-          "end_time": end_time,
+          "end_time": session["end_time"],
           "review_items_count": session["review_count"]
         })
 
@@ -250,9 +275,13 @@ def load(app):
   # todo GET /groups/:id/words/raw
   # 
   # This endpoint retrieves words within a specific group in a raw, unpaginated format, suitable for exporting or bulk processing. It's different from the existing /groups/:id/words which provides paginated results.
+  #
+  # For large groups ask for a streamed response: ?stream=1 streams the same
+  # JSON array, "Accept: application/x-ndjson" streams one word per line.
   
   @app.route('/api/groups/<int:id>/words/raw', methods=['GET'])
   @cross_origin()
+  @conditional('groups', 'words', 'word_groups')
   def get_group_words_raw(id):
     try:
       cursor = app.db.cursor()
@@ -263,29 +292,90 @@ def load(app):
       if not group:
         return jsonify({"error": "Group not found"}), 404
 
-      # Query to fetch all words associated with the group, without pagination
+      # Query to fetch all words associated with the group, without pagination.
+      # Each word is pre-serialized in word_exports (see 0012_add_word_parts.sql).
       cursor.execute('''
-      SELECT w.*
+      SELECT e.json
       FROM words w
       JOIN word_groups wg ON w.id = wg.word_id
+      JOIN word_exports e ON e.word_id = w.id
       WHERE wg.group_id = ?
       ORDER BY w.kanji
       ''', (id,))
 
+      if wants_stream():
+        return stream_rows(cursor, render_raw_word, ndjson=wants_ndjson())
+
       words = cursor.fetchall()
 
-      # Format as a simple list of word dictionaries
-      words_data = []
-      for word in words:
-        words_data.append({
+      if negotiated_format() == 'msgpack':
+        return jsonify([json.loads(word["json"]) for word in words])
+
+      # Return the raw list, concatenated from the stored JSON
+      body = '[' + ','.join(render_raw_word(word) for word in words) + ']'
+      return Response(body, mimetype='application/json')
+
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: GET /groups/:id/due?limit=N - the group's next N cards to study
+  #
+  # Words whose next review (see lib/scheduler.py) is due now, most overdue
+  # first, then words that were never reviewed (next_due_at is the epoch).
+  # Both are ranges of the (group_id, next_due_at) index, so the cost depends
+  # on N, not on the size of the group. Not @conditional: the answer changes
+  # as time passes.
+  @app.route('/api/groups/<int:id>/due', methods=['GET'])
+  @cross_origin()
+  def get_group_due_words(id):
+    try:
+      cursor = app.db.cursor()
+
+      limit = request.args.get('limit', 20, type=int)
+      limit = min(max(1, limit), MAX_DUE_LIMIT)
+
+      # Check if the group exists
+      cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
+      if not cursor.fetchone():
+        return jsonify({"error": "Group not found"}), 404
+
+      now = format_timestamp(datetime.utcnow())
+      query = '''
+        SELECT w.id, w.kanji, w.romaji, w.english,
+            wg.next_due_at, s.repetitions, s.interval_days, s.ease, s.last_reviewed_at
+        FROM word_groups wg
+        JOIN words w ON w.id = wg.word_id
+        LEFT JOIN word_schedule s ON s.word_id = wg.word_id
+        WHERE wg.group_id = ? AND wg.next_due_at {condition}
+        ORDER BY wg.next_due_at
+        LIMIT ?
+      '''
+
+      # Reviews that are due, then new words to fill up the batch
+      cursor.execute(query.format(condition='> ? AND wg.next_due_at <= ?'), (id, UNSCHEDULED, now, limit))
+      words = cursor.fetchall()
+      if len(words) < limit:
+        cursor.execute(query.format(condition='= ?'), (id, UNSCHEDULED, limit - len(words)))
+        words += cursor.fetchall()
+
+      return jsonify({
+        "words": [{
           "id": word["id"],
           "kanji": word["kanji"],
           "romaji": word["romaji"],
           "english": word["english"],
-          "parts": json.loads(word["parts"])  # Deserialize 'parts' from JSON
-        })
-
-      return jsonify(words_data)  # Return the raw list
+          "due_at": word["next_due_at"] if word["next_due_at"] != UNSCHEDULED else None,
+          "last_reviewed_at": word["last_reviewed_at"],
+          "repetitions": word["repetitions"] or 0,
+          "interval_days": word["interval_days"] or 0,
+          "ease": word["ease"]
+        } for word in words],
+        "now": now
+      })
 
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
\ No newline at end of file
+      return jsonify({"error": str(e)}), 500
+
+# A word_exports row is the word's JSON already
+def render_raw_word(word):
+  return word["json"]
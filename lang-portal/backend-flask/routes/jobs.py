@@ -0,0 +1,18 @@
+from flask import jsonify
+from flask_cors import cross_origin
+
+def load(app):
+  # Background jobs started by this process, most recent first
+  @app.route('/api/jobs', methods=['GET'])
+  @cross_origin()
+  def get_jobs():
+    return jsonify({"jobs": [job.to_dict() for job in app.jobs.list()]})
+
+  # Status, progress and result of one job (see lib/jobs.py)
+  @app.route('/api/jobs/<job_id>', methods=['GET'])
+  @cross_origin()
+  def get_job(job_id):
+    job = app.jobs.get(job_id)
+    if job is None:
+      return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
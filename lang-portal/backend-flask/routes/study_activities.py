@@ -2,9 +2,12 @@ from flask import jsonify, request
 from flask_cors import cross_origin
 import math
 
+from lib.conditional import conditional
+
 def load(app):
     @app.route('/api/study-activities', methods=['GET'])
     @cross_origin()
+    @conditional('study_activities')
     def get_study_activities():
         cursor = app.db.cursor()
         cursor.execute('SELECT id, name, url, preview_url FROM study_activities')
@@ -19,6 +22,7 @@ def load(app):
 
     @app.route('/api/study-activities/<int:id>', methods=['GET'])
     @cross_origin()
+    @conditional('study_activities')
     def get_study_activity(id):
         cursor = app.db.cursor()
         cursor.execute('SELECT id, name, url, preview_url FROM study_activities WHERE id = ?', (id,))
@@ -36,6 +40,7 @@ def load(app):
 
     @app.route('/api/study-activities/<int:id>/sessions', methods=['GET'])
     @cross_origin()
+    @conditional('study_activities', 'study_sessions', 'groups')
     def get_study_activity_sessions(id):
         cursor = app.db.cursor()
         
@@ -49,14 +54,8 @@ def load(app):
         per_page = request.args.get('per_page', 10, type=int)
         offset = (page - 1) * per_page
 
-        # Get total count
-        cursor.execute('''
-            SELECT COUNT(*) as count 
-            FROM study_sessions ss
-            JOIN groups g ON g.id = ss.group_id
-            WHERE ss.study_activity_id = ?
-        ''', (id,))
-        total_count = cursor.fetchone()['count']
+        # Get total count (trigger-maintained counter)
+        total_count = app.db.count('activity_study_sessions', id)
 
         # Get paginated sessions
         cursor.execute('''
@@ -66,14 +65,13 @@ def load(app):
                 g.name as group_name,
                 sa.name as activity_name,
                 ss.created_at,
+                ss.ended_at,
                 ss.study_activity_id as activity_id,
-                COUNT(wri.id) as review_items_count
+                ss.review_count as review_items_count
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
             WHERE ss.study_activity_id = ?
-            GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
             ORDER BY ss.created_at DESC
             LIMIT ? OFFSET ?
         ''', (id, per_page, offset))
@@ -87,7 +85,7 @@ def load(app):
                 'activity_id': session['activity_id'],
                 'activity_name': session['activity_name'],
                 'start_time': session['created_at'],
-                'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
+                'end_time': session['ended_at'],
                 'review_items_count': session['review_items_count']
             } for session in sessions],
             'total': total_count,
@@ -98,6 +96,7 @@ def load(app):
 
     @app.route('/api/study-activities/<int:id>/launch', methods=['GET'])
     @cross_origin()
+    @conditional('study_activities', 'groups')
     def get_study_activity_launch_data(id):
         cursor = app.db.cursor()
         
@@ -3,9 +3,16 @@ from flask_cors import cross_origin
 from datetime import datetime
 import math
 
+from lib.reviews import validate_review_items, record_review_items
+from lib.review_queue import QueueFull
+from lib.reset import reset_study_history
+from lib.jobs import JobRunning
+from lib.conditional import conditional
+
 def load(app):
   @app.route('/api/study-sessions', methods=['GET'])
   @cross_origin()
+  @conditional('study_sessions', 'groups', 'study_activities')
   def get_study_sessions():
     try:
       cursor = app.db.cursor()
@@ -15,14 +22,8 @@ def load(app):
       per_page = request.args.get('per_page', 10, type=int)
       offset = (page - 1) * per_page
 
-      # Get total count
-      cursor.execute('''
-      SELECT COUNT(*) as count
-      FROM study_sessions ss
-      JOIN groups g ON g.id = ss.group_id
-      JOIN study_activities sa ON sa.id = ss.study_activity_id
-      ''')
-      total_count = cursor.fetchone()['count']
+      # Get total count (trigger-maintained counter)
+      total_count = app.db.count('study_sessions')
 
       # Get paginated sessions
       cursor.execute('''
@@ -33,12 +34,11 @@ def load(app):
       sa.id as activity_id,
       sa.name as activity_name,
       ss.created_at,
-      COUNT(wri.id) as review_items_count
+      ss.ended_at,
+      ss.review_count as review_items_count
       FROM study_sessions ss
       JOIN groups g ON g.id = ss.group_id
       JOIN study_activities sa ON sa.id = ss.study_activity_id
-      LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-      GROUP BY ss.id
       ORDER BY ss.created_at DESC
       LIMIT ? OFFSET ?
       ''', (per_page, offset))
@@ -52,7 +52,7 @@ def load(app):
           'activity_id': session['activity_id'],
           'activity_name': session['activity_name'],
           'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
+          'end_time': session['ended_at'],
           'review_items_count': session['review_items_count']
         } for session in sessions],
         'total': total_count,
@@ -63,8 +63,12 @@ def load(app):
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
+  # Words reviewed in the session come from the recent answers only; pass
+  # ?include_archived=1 to also read answers moved to the archive by
+  # `invoke archive-reviews`.
   @app.route('/api/study-sessions/<id>', methods=['GET'])
   @cross_origin()
+  @conditional('study_sessions', 'groups', 'study_activities', 'words', 'word_review_items')
   def get_study_session(id):
     try:
       cursor = app.db.cursor()
@@ -78,13 +82,12 @@ def load(app):
       sa.id as activity_id,
       sa.name as activity_name,
       ss.created_at,
-      COUNT(wri.id) as review_items_count
+      ss.ended_at,
+      ss.review_count as review_items_count
       FROM study_sessions ss
       JOIN groups g ON g.id = ss.group_id
       JOIN study_activities sa ON sa.id = ss.study_activity_id
-      LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
       WHERE ss.id = ?
-      GROUP BY ss.id
       ''', (id,))
 
       session = cursor.fetchone()
@@ -96,14 +99,19 @@ def load(app):
       per_page = request.args.get('per_page', 10, type=int)
       offset = (page - 1) * per_page
 
+      # Recent answers, or recent and archived ones (see 0013_add_review_archive.sql)
+      review_items = 'word_review_items'
+      if request.args.get('include_archived') in ('1', 'true'):
+        review_items = 'all_word_review_items'
+
       # Get the words reviewed in this session with their review status
-      cursor.execute('''
+      cursor.execute(f'''
       SELECT
       w.*,
       COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as session_correct_count,
       COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as session_wrong_count
       FROM words w
-      JOIN word_review_items wri ON wri.word_id = w.id
+      JOIN {review_items} wri ON wri.word_id = w.id
       WHERE wri.study_session_id = ?
       GROUP BY w.id
       ORDER BY w.kanji
@@ -113,10 +121,10 @@ def load(app):
       words = cursor.fetchall()
 
       # Get total count of words
-      cursor.execute('''
+      cursor.execute(f'''
       SELECT COUNT(DISTINCT w.id) as count
       FROM words w
-      JOIN word_review_items wri ON wri.word_id = w.id
+      JOIN {review_items} wri ON wri.word_id = w.id
       WHERE wri.study_session_id = ?
       ''', (id,))
 
@@ -130,7 +138,7 @@ def load(app):
           'activity_id': session['activity_id'],
           'activity_name': session['activity_name'],
           'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time
+          'end_time': session['ended_at'],
           'review_items_count': session['review_items_count']
         },
         'words': [{
@@ -151,6 +159,13 @@ def load(app):
 
   # todo POST /study_sessions/:id/review
   # This endpoint records the results of a review within a study session. It receives a list of word review items, each containing the word ID, whether it was answered correctly, and (optionally) a timestamp.
+  #
+  # Items are validated and written as a set (see lib/reviews.py). Invalid
+  # items are reported in "errors" by index; the valid ones are still recorded.
+  #
+  # With REVIEW_WRITE_BEHIND the valid items are queued for the writer thread
+  # and the response is 202 Accepted. Pass ?durable=1 (or "durable": true) to
+  # wait until they are committed instead (201).
   
   @app.route('/api/study-sessions/<int:id>/review', methods=['POST'])
   @cross_origin()
@@ -164,59 +179,67 @@ def load(app):
             return jsonify({"error": "Study session not found"}), 404
 
         # Get review data from the request body
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         review_items = data.get('review_items')  # Expecting a list
 
         if not review_items or not isinstance(review_items, list):
             return jsonify({"error": "review_items must be a non-empty list"}), 400
 
-        # Insert each review item
-        for item in review_items:
-            word_id = item.get('word_id')
-            correct = item.get('correct')
-            created_at = item.get('created_at', datetime.utcnow()) # Use current time if not provided.
-
-            # Basic validation
-            if word_id is None or correct is None:
-                return jsonify({"error": "Each review item must have word_id and correct"}), 400
-            if not isinstance(correct, bool):
-                return jsonify({"error": "correct must be a boolean"}), 400
-
-            # Check if word exists.  Important for data integrity.
-            cursor.execute('SELECT id FROM words WHERE id = ?', (word_id,))
-            if not cursor.fetchone():
-                return jsonify({"error": f"Word with id {word_id} not found"}), 400
-
-            # Insert into word_review_items
-            cursor.execute('''
-                INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
-                VALUES (?, ?, ?, ?)
-            ''', (word_id, id, int(correct), created_at))  # Convert correct to int (0 or 1)
+        max_items = app.config['MAX_REVIEW_ITEMS']
+        if len(review_items) > max_items:
+            return jsonify({"error": f"review_items can contain at most {max_items} items"}), 413
 
-        app.db.commit()
-
-        # Update correct_count and wrong_count in word_reviews table
-        # This is done *after* inserting all review items to avoid partial updates.
-        for item in review_items:
-            word_id = item.get('word_id')
-            correct = item.get('correct')
+        rows, errors = validate_review_items(cursor, review_items)
+        if not rows:
+            return jsonify({"error": "No valid review items", "errors": errors}), 400
 
-            cursor.execute('''
-                INSERT INTO word_reviews (word_id, correct_count, wrong_count)
-                VALUES (?, ?, ?)
-                ON CONFLICT(word_id) DO UPDATE SET
-                correct_count = correct_count + ?,
-                wrong_count = wrong_count + ?
-            ''', (word_id, int(correct), 1-int(correct), int(correct), 1-int(correct)))
+        if app.review_writer is not None:
+            return queue_review_results(id, rows, errors, durable=wants_durable(data))
 
+        # Insert the items and update word_reviews in one transaction
+        record_review_items(cursor, id, rows)
         app.db.commit()
+        app.db.invalidate('word_review_items', 'word_reviews', 'study_sessions')
 
-        return jsonify({"message": "Review results recorded successfully"}), 201
+        return jsonify({
+            "message": "Review results recorded successfully",
+            "recorded": len(rows),
+            "errors": errors
+        }), 201
 
     except Exception as e:
         app.db.get().rollback()
         return jsonify({"error": str(e)}), 500
 
+  # True when the client asked to wait for the review results to be committed
+  def wants_durable(data):
+    return request.args.get('durable') in ('1', 'true') or data.get('durable') is True
+
+  def queue_review_results(id, rows, errors, durable):
+    try:
+        batch = app.review_writer.submit(id, rows, timeout=app.config['REVIEW_QUEUE_TIMEOUT'])
+    except QueueFull:
+        response = jsonify({"error": "Too many pending review results, try again shortly"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    if not durable:
+        return jsonify({
+            "message": "Review results queued",
+            "queued": len(rows),
+            "errors": errors
+        }), 202
+
+    if not batch.wait(timeout=30):
+        return jsonify({"error": "Timed out waiting for review results to be written"}), 504
+    if batch.error is not None:
+        return jsonify({"error": str(batch.error)}), 500
+    return jsonify({
+        "message": "Review results recorded successfully",
+        "recorded": len(rows),
+        "errors": errors
+    }), 201
+
   # todo /study_sessions POST
   # This endpoint creates a new study session. It receives the group ID and study activity ID, and records the start time (using the current server time).
   
@@ -257,6 +280,7 @@ def load(app):
         # Get the ID of the newly created session
         session_id = cursor.lastrowid
         app.db.commit()  # Commit the transaction
+        app.db.invalidate('study_sessions')
 
         # Return the ID of the created session
         return jsonify({"id": session_id}), 201  # 201 Created status code
@@ -265,20 +289,61 @@ def load(app):
         app.db.get().rollback()  # Rollback in case of error.
         return jsonify({"error": str(e)}), 500
 
+  # Clear study history in the background (see lib/reset.py). Optional scope:
+  # group_id or study_activity_id (JSON body or query string). "fast": true
+  # drops and recreates the tables when everything is cleared. Poll the
+  # returned job at GET /api/jobs/<job_id>.
   @app.route('/api/study-sessions/reset', methods=['POST'])
   @cross_origin()
   def reset_study_sessions():
     try:
-      cursor = app.db.cursor()
-
-      # First delete all word review items since they have foreign key constraints
-      cursor.execute('DELETE FROM word_review_items')
-
-      # Then delete all study sessions
-      cursor.execute('DELETE FROM study_sessions')
-
-      app.db.commit()
+      data = request.get_json(silent=True) or {}
+      group_id = data.get('group_id', request.args.get('group_id'))
+      study_activity_id = data.get('study_activity_id', request.args.get('study_activity_id'))
+      fast = request.args.get('fast') in ('1', 'true') or data.get('fast') is True
+
+      if group_id is not None and study_activity_id is not None:
+        return jsonify({"error": "Pass either group_id or study_activity_id, not both"}), 400
+      try:
+        group_id = int(group_id) if group_id is not None else None
+        study_activity_id = int(study_activity_id) if study_activity_id is not None else None
+      except (TypeError, ValueError):
+        return jsonify({"error": "group_id and study_activity_id must be integers"}), 400
 
-      return jsonify({"message": "Study history cleared successfully"}), 200
+      cursor = app.db.cursor()
+      if group_id is not None:
+        cursor.execute('SELECT id FROM groups WHERE id = ?', (group_id,))
+        if not cursor.fetchone():
+          return jsonify({"error": "Group not found"}), 404
+      if study_activity_id is not None:
+        cursor.execute('SELECT id FROM study_activities WHERE id = ?', (study_activity_id,))
+        if not cursor.fetchone():
+          return jsonify({"error": "Study activity not found"}), 404
+
+      # Write queued review results first so they are cleared too
+      if app.review_writer is not None:
+        app.review_writer.flush(timeout=app.config['REVIEW_QUEUE_TIMEOUT'])
+
+      params = {"group_id": group_id, "study_activity_id": study_activity_id, "fast": fast}
+      try:
+        job = app.jobs.submit(
+          'reset', reset_study_history, app.db,
+          group_id=group_id,
+          study_activity_id=study_activity_id,
+          fast=fast,
+          batch_size=app.config['RESET_BATCH_SIZE'],
+          params=params,
+          exclusive=True
+        )
+      except JobRunning as e:
+        return jsonify({"error": str(e), "job_id": e.job.id, "status_url": f"/api/jobs/{e.job.id}"}), 409
+
+      response = jsonify({
+        "message": "Study history reset started",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}"
+      })
+      response.headers['Location'] = f"/api/jobs/{job.id}"
+      return response, 202
     except Exception as e:
       return jsonify({"error": str(e)}), 500
\ No newline at end of file
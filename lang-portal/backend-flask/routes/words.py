@@ -2,12 +2,117 @@ from flask import request, jsonify, g
 from flask_cors import cross_origin
 import json
 
+from lib.pagination import keyset_clause, decode_cursor, next_cursor
+from lib.streaming import stream_rows, wants_stream, wants_ndjson, dumps
+from lib.conditional import conditional
+
+# sort_by -> (sort column, tie-breaking id column) for word listings
+SORT_COLUMNS = {
+  'kanji': ('w.kanji', 'w.id'),
+  'romaji': ('w.romaji', 'w.id'),
+  'english': ('w.english', 'w.id'),
+  'correct_count': ('r.correct_count', 'r.word_id'),
+  'wrong_count': ('r.wrong_count', 'r.word_id')
+}
+
+# Turn user input into an FTS5 query: every term quoted (so FTS syntax in the
+# input is taken literally) and matched as a prefix
+def fts_query(text):
+  terms = text.split()
+  return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+# Words by id, in the order the ids were given, each with its review counts
+# and its groups. The groups of every word are assembled as a JSON array by
+# SQLite in the same pass (one word_groups index seek per word).
+BATCH_WORDS_QUERY = '''
+  SELECT w.id, w.kanji, w.romaji, w.english,
+         COALESCE(r.correct_count, 0) AS correct_count,
+         COALESCE(r.wrong_count, 0) AS wrong_count,
+         (SELECT json_group_array(json_object('id', g.id, 'name', g.name))
+          FROM word_groups wg
+          JOIN groups g ON g.id = wg.group_id
+          WHERE wg.word_id = w.id) AS groups
+  FROM json_each(?) ids
+  JOIN words w ON w.id = ids.value
+  LEFT JOIN word_reviews r ON r.word_id = w.id
+  ORDER BY ids.key
+'''
+
+# Parse word ids from a list of ints / digit strings; duplicates are dropped.
+# Raises ValueError for anything else.
+def parse_word_ids(values):
+  ids = []
+  for value in values:
+    if isinstance(value, str) and value.strip().isascii() and value.strip().isdecimal():
+      value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+      raise ValueError('ids must be integers')
+    ids.append(value)
+  return list(dict.fromkeys(ids))
+
+# Render a BATCH_WORDS_QUERY row as JSON without decoding its groups
+def render_batch_word(word):
+  return (
+    f'{{"id":{word["id"]},"kanji":{dumps(word["kanji"])},"romaji":{dumps(word["romaji"])},'
+    f'"english":{dumps(word["english"])},"correct_count":{word["correct_count"]},'
+    f'"wrong_count":{word["wrong_count"]},"groups":{word["groups"]}}}'
+  )
+
 def load(app):
+  # Resolve many words in one query (GET /words?ids=... and POST /words/batch).
+  # ?stream=1 streams a JSON array of the words, "Accept: application/x-ndjson"
+  # one word per line; otherwise the words are returned with the ids that were
+  # not found.
+  def get_words_by_ids(ids):
+    max_ids = app.config['MAX_WORD_LOOKUP_IDS']
+    if not ids:
+      return jsonify({"error": "ids must be a non-empty list"}), 400
+    if len(ids) > max_ids:
+      return jsonify({"error": f"ids can contain at most {max_ids} ids"}), 413
+
+    cursor = app.db.cursor()
+    cursor.execute(BATCH_WORDS_QUERY, (json.dumps(ids),))
+
+    if wants_stream():
+      return stream_rows(cursor, render_batch_word, ndjson=wants_ndjson())
+
+    words = cursor.fetchall()
+    found = {word["id"] for word in words}
+    return jsonify({
+      "words": [{
+        "id": word["id"],
+        "kanji": word["kanji"],
+        "romaji": word["romaji"],
+        "english": word["english"],
+        "correct_count": word["correct_count"],
+        "wrong_count": word["wrong_count"],
+        "groups": app.json.loads(word["groups"])
+      } for word in words],
+      "not_found": [id for id in ids if id not in found]
+    })
+
   # Endpoint: GET /words with pagination (50 words per page)
+  #
+  # Two pagination modes:
+  #   ?page=N       offset pagination (the original mode)
+  #   ?cursor=TOKEN keyset pagination; pass an empty cursor for the first page
+  #                 and then the returned next_cursor. Cost per page does not
+  #                 grow with how deep into the list the client is.
+  #
+  # ?ids=1,2,3 instead returns exactly those words with their groups (see
+  # get_words_by_ids); use POST /words/batch for long id lists.
   @app.route('/api/words', methods=['GET'])
   @cross_origin()
+  @conditional('words', 'word_reviews', 'word_groups', 'groups')
   def get_words():
     try:
+      if 'ids' in request.args:
+        try:
+          ids = parse_word_ids(request.args['ids'].split(',') if request.args['ids'] else [])
+        except ValueError as e:
+          return jsonify({"error": str(e)}), 400
+        return get_words_by_ids(ids)
+
       cursor = app.db.cursor()
 
       # Get the current page number from query parameters (default is 1)
@@ -28,38 +133,262 @@ def load(app):
       if order not in ['asc', 'desc']:
         order = 'asc'
 
-      # Query to fetch words with sorting
+      # Every word has a word_reviews row, so the counts can be sorted on
+      # (and seeked to) through the word_reviews indexes
+      sort_column, id_column = SORT_COLUMNS[sort_by]
+
+      page_cursor = request.args.get('cursor')
+      if page_cursor is not None:
+        # Keyset mode: seek past the last row of the previous page
+        where, order_by = keyset_clause(sort_column, id_column, order)
+        params = []
+        if page_cursor:
+          try:
+            params = list(decode_cursor(page_cursor, sort_by, order))
+          except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        else:
+          where = '1'
+
+        cursor.execute(f'''
+          SELECT w.id, w.kanji, w.romaji, w.english,
+              r.correct_count, r.wrong_count
+          FROM word_reviews r
+          JOIN words w ON w.id = r.word_id
+          WHERE {where}
+          ORDER BY {order_by}
+          LIMIT ?
+        ''', (*params, words_per_page + 1))
+      else:
+        # Query to fetch words with sorting
+        cursor.execute(f'''
+          SELECT w.id, w.kanji, w.romaji, w.english,
+              r.correct_count, r.wrong_count
+          FROM word_reviews r
+          JOIN words w ON w.id = r.word_id
+          ORDER BY {sort_column} {order}, {id_column} {order}
+          LIMIT ? OFFSET ?
+        ''', (words_per_page + 1, offset))
+
+      words = cursor.fetchall()
+      has_more = len(words) > words_per_page
+      words = words[:words_per_page]
+
+      # Total number of words (trigger-maintained counter)
+      total_words = app.db.count('words')
+      total_pages = (total_words + words_per_page - 1) // words_per_page
+
+      # The selected columns are exactly the response fields, so the rows are
+      # serialized as they are (see lib/json_provider.py)
+      response = {
+        "words": words,
+        "total_words": total_words,
+        "next_cursor": next_cursor(words, has_more, sort_by, order)
+      }
+      if page_cursor is None:
+        response["total_pages"] = total_pages
+        response["current_page"] = page
+      return jsonify(response)
+
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: POST /words/batch {"ids": [...]} - the body form of GET /words?ids=
+  @app.route('/api/words/batch', methods=['POST'])
+  @cross_origin()
+  def get_words_batch():
+    try:
+      data = request.get_json(silent=True) or {}
+      ids = data.get('ids')
+      if not isinstance(ids, list):
+        return jsonify({"error": "ids must be a non-empty list"}), 400
+      try:
+        ids = parse_word_ids(ids)
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+      return get_words_by_ids(ids)
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Words in one mastery state (see 0010_add_mastery_state.sql), in word id
+  # order straight from the mastery_state index. Paginated like GET /words:
+  # ?page=N or ?cursor=. The state is fixed, so a cursor only needs the last
+  # word id to seek within the index.
+  def get_words_in_state(state):
+    cursor = app.db.cursor()
+
+    page = max(1, int(request.args.get('page', 1)))
+    words_per_page = 50
+    offset = (page - 1) * words_per_page
+
+    page_cursor = request.args.get('cursor')
+    if page_cursor:
+      # Keyset mode: seek past the last row of the previous page
+      try:
+        value, last_id = decode_cursor(page_cursor, 'mastery_state', 'asc')
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+      if value != state:
+        return jsonify({"error": "Invalid cursor"}), 400
+      where = 'r.word_id > ?'
+      params = [last_id, words_per_page + 1]
+      limit = 'LIMIT ?'
+    else:
+      where = '1'
+      params = [words_per_page + 1, offset]
+      limit = 'LIMIT ? OFFSET ?'
+
+    cursor.execute(f'''
+      SELECT w.id, w.kanji, w.romaji, w.english,
+          r.correct_count, r.wrong_count, r.mastery_state
+      FROM word_reviews r
+      JOIN words w ON w.id = r.word_id
+      WHERE r.mastery_state = ? AND {where}
+      ORDER BY r.word_id
+      {limit}
+    ''', (state, *params))
+    words = cursor.fetchall()
+    has_more = len(words) > words_per_page
+    words = words[:words_per_page]
+
+    # Counted through the index
+    cursor.execute('SELECT COUNT(*) FROM word_reviews WHERE mastery_state = ?', (state,))
+    total_words = cursor.fetchone()[0]
+
+    response = {
+      "words": [{
+        "id": word["id"],
+        "kanji": word["kanji"],
+        "romaji": word["romaji"],
+        "english": word["english"],
+        "correct_count": word["correct_count"],
+        "wrong_count": word["wrong_count"]
+      } for word in words],
+      "total_words": total_words,
+      "next_cursor": next_cursor(words, has_more, 'mastery_state', 'asc')
+    }
+    if not page_cursor:
+      response["total_pages"] = (total_words + words_per_page - 1) // words_per_page
+      response["current_page"] = page
+    return jsonify(response)
+
+  # Endpoint: GET /words/mastered - at least 5 reviews and at least 80% correct
+  @app.route('/api/words/mastered', methods=['GET'])
+  @cross_origin()
+  @conditional('words', 'word_reviews')
+  def get_mastered_words():
+    try:
+      return get_words_in_state('mastered')
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: GET /words/struggling - at least 3 reviews, more wrong than correct
+  @app.route('/api/words/struggling', methods=['GET'])
+  @cross_origin()
+  @conditional('words', 'word_reviews')
+  def get_struggling_words():
+    try:
+      return get_words_in_state('struggling')
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: GET /words/search?q=... full-text search over kanji, romaji and english
+  #
+  # Every whitespace-separated term must match the start of a word token
+  # (prefix query), results are ranked with bm25 and can be restricted to a
+  # group with ?group_id=. Paginated like GET /words.
+  @app.route('/api/words/search', methods=['GET'])
+  @cross_origin()
+  @conditional('words', 'word_reviews', 'word_groups')
+  def search_words():
+    try:
+      cursor = app.db.cursor()
+
+      match = fts_query(request.args.get('q', ''))
+      if not match:
+        return jsonify({"error": "q is required"}), 400
+
+      page = max(1, int(request.args.get('page', 1)))
+      words_per_page = 50
+      offset = (page - 1) * words_per_page
+
+      # Optional group filter
+      group_id = request.args.get('group_id', type=int)
+      group_join = ''
+      params = [match]
+      if group_id is not None:
+        group_join = 'JOIN word_groups wg ON wg.word_id = f.rowid AND wg.group_id = ?'
+        params = [group_id, match]
+
       cursor.execute(f'''
-        SELECT w.id, w.kanji, w.romaji, w.english, 
-            COALESCE(r.correct_count, 0) AS correct_count,
-            COALESCE(r.wrong_count, 0) AS wrong_count
-        FROM words w
-        LEFT JOIN word_reviews r ON w.id = r.word_id
-        ORDER BY {sort_by} {order}
+        SELECT w.id, w.kanji, w.romaji, w.english,
+            r.correct_count, r.wrong_count
+        FROM words_fts f
+        {group_join}
+        JOIN words w ON w.id = f.rowid
+        JOIN word_reviews r ON r.word_id = w.id
+        WHERE words_fts MATCH ?
+        ORDER BY bm25(words_fts), w.id
         LIMIT ? OFFSET ?
-      ''', (words_per_page, offset))
-
+      ''', (*params, words_per_page, offset))
       words = cursor.fetchall()
 
-      # Query the total number of words
-      cursor.execute('SELECT COUNT(*) FROM words')
+      cursor.execute(f'''
+        SELECT COUNT(*)
+        FROM words_fts f
+        {group_join}
+        WHERE words_fts MATCH ?
+      ''', params)
       total_words = cursor.fetchone()[0]
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
-      # Format the response
-      words_data = []
-      for word in words:
-        words_data.append({
-          "id": word["id"],
-          "kanji": word["kanji"],
-          "romaji": word["romaji"],
-          "english": word["english"],
-          "correct_count": word["correct_count"],
-          "wrong_count": word["wrong_count"]
-        })
+      return jsonify({
+        "words": words,  # Rows serialize as objects (lib/json_provider.py)
+        "total_pages": total_pages,
+        "current_page": page,
+        "total_words": total_words
+      })
+
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: GET /words/by-part?kanji=行 - words with that kanji (or kana) as
+  # one of their parts, found through the word_parts kanji index. Paginated
+  # like GET /words, in word id order.
+  @app.route('/api/words/by-part', methods=['GET'])
+  @cross_origin()
+  @conditional('words', 'word_reviews')
+  def get_words_by_part():
+    try:
+      cursor = app.db.cursor()
+
+      kanji = request.args.get('kanji', '').strip()
+      if not kanji:
+        return jsonify({"error": "kanji is required"}), 400
+
+      page = max(1, int(request.args.get('page', 1)))
+      words_per_page = 50
+      offset = (page - 1) * words_per_page
+
+      cursor.execute('''
+        SELECT w.id, w.kanji, w.romaji, w.english,
+            r.correct_count, r.wrong_count
+        FROM words w
+        JOIN word_reviews r ON r.word_id = w.id
+        WHERE w.id IN (SELECT word_id FROM word_parts WHERE kanji = ?)
+        ORDER BY w.id
+        LIMIT ? OFFSET ?
+      ''', (kanji, words_per_page, offset))
+      words = cursor.fetchall()
+
+      cursor.execute('''
+        SELECT COUNT(DISTINCT word_id) FROM word_parts WHERE kanji = ?
+      ''', (kanji,))
+      total_words = cursor.fetchone()[0]
+      total_pages = (total_words + words_per_page - 1) // words_per_page
 
       return jsonify({
-        "words": words_data,
+        "words": words,  # Rows serialize as objects (lib/json_provider.py)
         "total_pages": total_pages,
         "current_page": page,
         "total_words": total_words
@@ -67,44 +396,24 @@ def load(app):
 
     except Exception as e:
       return jsonify({"error": str(e)}), 500
-    finally:
-      app.db.close()
 
   # Endpoint: GET /words/:id to get a single word with its details
   @app.route('/api/words/<int:word_id>', methods=['GET'])
   @cross_origin()
+  @conditional('words', 'word_reviews', 'word_groups', 'groups')
   def get_word(word_id):
     try:
       cursor = app.db.cursor()
       
-      # Query to fetch the word and its details
-      cursor.execute('''
-        SELECT w.id, w.kanji, w.romaji, w.english,
-               COALESCE(r.correct_count, 0) AS correct_count,
-               COALESCE(r.wrong_count, 0) AS wrong_count,
-               GROUP_CONCAT(DISTINCT g.id || '::' || g.name) as groups
-        FROM words w
-        LEFT JOIN word_reviews r ON w.id = r.word_id
-        LEFT JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN groups g ON wg.group_id = g.id
-        WHERE w.id = ?
-        GROUP BY w.id
-      ''', (word_id,))
+      # Query to fetch the word and its details (groups come back as JSON)
+      cursor.execute(BATCH_WORDS_QUERY, (json.dumps([word_id]),))
       
       word = cursor.fetchone()
       
       if not word:
         return jsonify({"error": "Word not found"}), 404
       
-      # Parse the groups string into a list of group objects
-      groups = []
-      if word["groups"]:
-        for group_str in word["groups"].split(','):
-          group_id, group_name = group_str.split('::')
-          groups.append({
-            "id": int(group_id),
-            "name": group_name
-          })
+      groups = app.json.loads(word["groups"])
       
       return jsonify({
         "word": {
@@ -0,0 +1,106 @@
+-- Recompute every trigger-maintained counter and rollup from the base tables.
+-- Answers are read from all_word_review_items, i.e. recent and archived ones.
+-- Run with `invoke rebuild-stats` if they ever drift (e.g. after manual edits).
+
+DELETE FROM daily_study_stats;
+DELETE FROM daily_group_activity;
+DELETE FROM word_mastery;
+
+INSERT INTO daily_study_stats (study_date, sessions_count, reviews_count, correct_count, wrong_count)
+SELECT study_date, SUM(sessions_count), SUM(reviews_count), SUM(correct_count), SUM(wrong_count)
+FROM (
+  SELECT date(created_at) AS study_date, COUNT(*) AS sessions_count,
+         0 AS reviews_count, 0 AS correct_count, 0 AS wrong_count
+  FROM study_sessions
+  GROUP BY date(created_at)
+  UNION ALL
+  SELECT date(created_at), 0, COUNT(*), SUM(correct = 1), SUM(correct = 0)
+  FROM all_word_review_items
+  GROUP BY date(created_at)
+)
+WHERE study_date IS NOT NULL
+GROUP BY study_date;
+
+INSERT INTO daily_group_activity (study_date, group_id, sessions_count)
+SELECT date(created_at), group_id, COUNT(*)
+FROM study_sessions
+WHERE date(created_at) IS NOT NULL
+GROUP BY date(created_at), group_id;
+
+INSERT INTO word_mastery (word_id, attempts, correct_count)
+SELECT word_id, COUNT(*), SUM(correct = 1)
+FROM all_word_review_items
+GROUP BY word_id;
+
+-- Counters (the word_mastery triggers above touched these, so reset them last)
+DELETE FROM counters;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'words', 0, COUNT(*) FROM words;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'groups', 0, COUNT(*) FROM groups;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'study_sessions', 0, COUNT(*) FROM study_sessions;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'group_study_sessions', group_id, COUNT(*) FROM study_sessions GROUP BY group_id;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'activity_study_sessions', study_activity_id, COUNT(*) FROM study_sessions GROUP BY study_activity_id;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'review_items', 0, COUNT(*) FROM all_word_review_items;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'review_items_correct', 0, COUNT(*) FROM all_word_review_items WHERE correct = 1;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'words_studied', 0, COUNT(*) FROM word_mastery;
+
+UPDATE groups
+SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
+
+-- Session summaries (one grouped pass over the answers)
+UPDATE study_sessions SET review_count = 0, correct_count = 0, wrong_count = 0, last_activity_at = NULL;
+
+UPDATE study_sessions SET
+  review_count = a.review_count,
+  correct_count = a.correct_count,
+  wrong_count = a.wrong_count,
+  last_activity_at = a.last_activity_at
+FROM (
+  SELECT study_session_id, COUNT(*) AS review_count, SUM(correct = 1) AS correct_count,
+         SUM(correct = 0) AS wrong_count, MAX(created_at) AS last_activity_at
+  FROM all_word_review_items
+  GROUP BY study_session_id
+) a
+WHERE a.study_session_id = study_sessions.id;
+
+UPDATE study_sessions SET ended_at = COALESCE(last_activity_at, datetime(created_at, '+30 minutes'));
+
+-- Per-word review totals (every word has a row, see 0002_add_sort_indexes.sql)
+INSERT OR IGNORE INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+SELECT id, 0, 0, NULL FROM words;
+
+-- Words without any answer left (e.g. after a reset) were never reviewed
+UPDATE word_reviews SET correct_count = 0, wrong_count = 0, last_reviewed = NULL
+WHERE word_id NOT IN (SELECT word_id FROM word_mastery)
+  AND (correct_count <> 0 OR wrong_count <> 0 OR last_reviewed IS NOT NULL);
+
+-- Totals and the latest answer, one grouped pass over the answers
+UPDATE word_reviews SET
+  correct_count = a.correct_count,
+  wrong_count = a.wrong_count,
+  last_reviewed = a.last_reviewed
+FROM (
+  SELECT word_id, SUM(correct = 1) AS correct_count, SUM(correct = 0) AS wrong_count,
+         datetime(MAX(created_at)) AS last_reviewed
+  FROM all_word_review_items
+  GROUP BY word_id
+) a
+WHERE a.word_id = word_reviews.word_id
+  AND (word_reviews.correct_count <> a.correct_count
+       OR word_reviews.wrong_count <> a.wrong_count
+       OR word_reviews.last_reviewed IS NOT a.last_reviewed);
@@ -0,0 +1,20 @@
+-- Recompute the study streak (see 0009_add_study_streak.sql) from the days
+-- in daily_study_stats. Part of `invoke rebuild-stats`; a scoped reset runs it
+-- on its own, since deleting sessions only clears the streak once none are left.
+
+INSERT OR REPLACE INTO study_streak (id, current_streak, longest_streak, last_study_date)
+WITH days AS (
+  SELECT study_date,
+         julianday(study_date) - ROW_NUMBER() OVER (ORDER BY study_date) AS run
+  FROM daily_study_stats
+  WHERE sessions_count > 0
+),
+runs AS (
+  SELECT MAX(study_date) AS last_date, COUNT(*) AS days
+  FROM days
+  GROUP BY run
+)
+SELECT 1,
+       COALESCE((SELECT days FROM runs ORDER BY last_date DESC LIMIT 1), 0),
+       COALESCE((SELECT MAX(days) FROM runs), 0),
+       (SELECT MAX(last_date) FROM runs);
@@ -0,0 +1,21 @@
+-- Rebuild search and export structures derived from the words table.
+
+INSERT INTO words_fts (words_fts) VALUES ('rebuild');
+
+-- word_parts and word_exports (see 0012_add_word_parts.sql)
+DELETE FROM word_parts;
+DELETE FROM word_exports;
+
+INSERT INTO word_parts (word_id, position, kanji, romaji)
+SELECT w.id, p.key, COALESCE(json_extract(p.value, '$.kanji'), ''),
+       CASE json_type(p.value, '$.romaji')
+         WHEN 'array' THEN json_extract(p.value, '$.romaji')
+         WHEN 'text' THEN json_array(json_extract(p.value, '$.romaji'))
+         ELSE '[]'
+       END
+FROM words w, json_each(CASE WHEN json_valid(w.parts) THEN w.parts ELSE '[]' END) p;
+
+INSERT INTO word_exports (word_id, json)
+SELECT id, json_object('id', id, 'kanji', kanji, 'romaji', romaji, 'english', english,
+                       'parts', json(CASE WHEN json_valid(parts) THEN parts ELSE '[]' END))
+FROM words;
@@ -0,0 +1,36 @@
+-- Secondary indexes for the dashboard, session listings and group joins
+
+-- Per-session review counts / correct counts (COUNT(wri.id), dashboard stats)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session_correct
+  ON word_review_items (study_session_id, correct);
+
+-- Per-word review history in chronological order
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word_created
+  ON word_review_items (word_id, created_at);
+
+-- Session listings per group / per activity, newest first
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created
+  ON study_sessions (group_id, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created
+  ON study_sessions (study_activity_id, created_at);
+
+-- Global session listing and the dashboard's most recent session
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created
+  ON study_sessions (created_at);
+
+-- A word can only be in a group once: drop duplicates left by repeated imports
+DELETE FROM word_groups
+WHERE rowid NOT IN (
+  SELECT MIN(rowid) FROM word_groups GROUP BY group_id, word_id
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_groups_group_word
+  ON word_groups (group_id, word_id);
+
+-- Reverse lookup: the groups a word belongs to
+CREATE INDEX IF NOT EXISTS idx_word_groups_word_group
+  ON word_groups (word_id, group_id);
+
+-- Refresh planner statistics for the new indexes
+ANALYZE;
@@ -0,0 +1,24 @@
+-- Indexes backing keyset (cursor) pagination of word lists.
+-- SQLite appends the rowid to every index, so each of these is really
+-- (sort column, id) and can seek straight to the row after a cursor.
+
+CREATE INDEX IF NOT EXISTS idx_words_kanji ON words (kanji);
+CREATE INDEX IF NOT EXISTS idx_words_romaji ON words (romaji);
+CREATE INDEX IF NOT EXISTS idx_words_english ON words (english);
+
+-- Sorting by correct_count / wrong_count walks word_reviews, so every word
+-- needs a row there (all zeroes until it is first reviewed)
+INSERT OR IGNORE INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+SELECT id, 0, 0, NULL FROM words;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_word_reviews
+AFTER INSERT ON words
+BEGIN
+  INSERT OR IGNORE INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+  VALUES (NEW.id, 0, 0, NULL);
+END;
+
+CREATE INDEX IF NOT EXISTS idx_word_reviews_correct_count ON word_reviews (correct_count);
+CREATE INDEX IF NOT EXISTS idx_word_reviews_wrong_count ON word_reviews (wrong_count);
+
+ANALYZE;
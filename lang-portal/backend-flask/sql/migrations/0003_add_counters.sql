@@ -0,0 +1,111 @@
+-- Exact row counters maintained by triggers, so list endpoints can read their
+-- totals with a primary key lookup instead of running COUNT(*).
+--
+--   name                     scope_id
+--   words                    0
+--   groups                   0
+--   study_sessions           0
+--   group_study_sessions     group id
+--   activity_study_sessions  study activity id
+--
+-- groups.words_count (the per-group word counter cache) is kept in sync the same way.
+
+CREATE TABLE IF NOT EXISTS counters (
+  name TEXT NOT NULL,
+  scope_id INTEGER NOT NULL DEFAULT 0,  -- 0 for global counters
+  value INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (name, scope_id)
+) WITHOUT ROWID;
+
+-- Backfill from the current data
+DELETE FROM counters;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'words', 0, COUNT(*) FROM words;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'groups', 0, COUNT(*) FROM groups;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'study_sessions', 0, COUNT(*) FROM study_sessions;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'group_study_sessions', group_id, COUNT(*) FROM study_sessions GROUP BY group_id;
+
+INSERT INTO counters (name, scope_id, value)
+SELECT 'activity_study_sessions', study_activity_id, COUNT(*) FROM study_sessions GROUP BY study_activity_id;
+
+UPDATE groups
+SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
+
+-- words
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_count
+AFTER INSERT ON words
+BEGIN
+  INSERT INTO counters (name, scope_id, value) VALUES ('words', 0, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_count
+AFTER DELETE ON words
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'words' AND scope_id = 0;
+END;
+
+-- groups
+CREATE TRIGGER IF NOT EXISTS trg_groups_insert_count
+AFTER INSERT ON groups
+BEGIN
+  INSERT INTO counters (name, scope_id, value) VALUES ('groups', 0, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_delete_count
+AFTER DELETE ON groups
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'groups' AND scope_id = 0;
+END;
+
+-- word_groups -> groups.words_count
+CREATE TRIGGER IF NOT EXISTS trg_word_groups_insert_count
+AFTER INSERT ON word_groups
+BEGIN
+  UPDATE groups SET words_count = COALESCE(words_count, 0) + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_groups_delete_count
+AFTER DELETE ON word_groups
+BEGIN
+  UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+END;
+
+-- study_sessions (global, per group, per activity)
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_count
+AFTER INSERT ON study_sessions
+BEGIN
+  INSERT INTO counters (name, scope_id, value) VALUES ('study_sessions', 0, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = value + 1;
+  INSERT INTO counters (name, scope_id, value) VALUES ('group_study_sessions', NEW.group_id, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = value + 1;
+  INSERT INTO counters (name, scope_id, value) VALUES ('activity_study_sessions', NEW.study_activity_id, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_count
+AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'study_sessions' AND scope_id = 0;
+  UPDATE counters SET value = value - 1 WHERE name = 'group_study_sessions' AND scope_id = OLD.group_id;
+  UPDATE counters SET value = value - 1 WHERE name = 'activity_study_sessions' AND scope_id = OLD.study_activity_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_update_count
+AFTER UPDATE OF group_id, study_activity_id ON study_sessions
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'group_study_sessions' AND scope_id = OLD.group_id;
+  UPDATE counters SET value = value - 1 WHERE name = 'activity_study_sessions' AND scope_id = OLD.study_activity_id;
+  INSERT INTO counters (name, scope_id, value) VALUES ('group_study_sessions', NEW.group_id, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = value + 1;
+  INSERT INTO counters (name, scope_id, value) VALUES ('activity_study_sessions', NEW.study_activity_id, 1)
+  ON CONFLICT (name, scope_id) DO UPDATE SET value = value + 1;
+END;
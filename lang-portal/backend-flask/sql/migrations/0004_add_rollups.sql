@@ -0,0 +1,162 @@
+-- Rollup tables behind /dashboard/stats, maintained incrementally by triggers
+-- on word_review_items and study_sessions.
+--
+-- New counters (see 0003_add_counters.sql):
+--   review_items          number of review answers
+--   review_items_correct  number of correct review answers
+--   words_studied         words with at least one review
+--   mastered_words        words with >= 5 reviews and >= 80% correct
+
+-- Per-day activity
+CREATE TABLE IF NOT EXISTS daily_study_stats (
+  study_date TEXT PRIMARY KEY,  -- YYYY-MM-DD
+  sessions_count INTEGER NOT NULL DEFAULT 0,
+  reviews_count INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  wrong_count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Per-day, per-group sessions (for "active groups in the last N days")
+CREATE TABLE IF NOT EXISTS daily_group_activity (
+  study_date TEXT NOT NULL,
+  group_id INTEGER NOT NULL,
+  sessions_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (study_date, group_id)
+) WITHOUT ROWID;
+
+-- Per-word review totals
+CREATE TABLE IF NOT EXISTS word_mastery (
+  word_id INTEGER PRIMARY KEY,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  FOREIGN KEY (word_id) REFERENCES words(id)
+);
+
+-- Backfill from the existing history
+INSERT INTO daily_study_stats (study_date, sessions_count, reviews_count, correct_count, wrong_count)
+SELECT study_date, SUM(sessions_count), SUM(reviews_count), SUM(correct_count), SUM(wrong_count)
+FROM (
+  SELECT date(created_at) AS study_date, COUNT(*) AS sessions_count,
+         0 AS reviews_count, 0 AS correct_count, 0 AS wrong_count
+  FROM study_sessions
+  GROUP BY date(created_at)
+  UNION ALL
+  SELECT date(created_at), 0, COUNT(*), SUM(correct = 1), SUM(correct = 0)
+  FROM word_review_items
+  GROUP BY date(created_at)
+)
+WHERE study_date IS NOT NULL
+GROUP BY study_date;
+
+INSERT INTO daily_group_activity (study_date, group_id, sessions_count)
+SELECT date(created_at), group_id, COUNT(*)
+FROM study_sessions
+WHERE date(created_at) IS NOT NULL
+GROUP BY date(created_at), group_id;
+
+INSERT INTO word_mastery (word_id, attempts, correct_count)
+SELECT word_id, COUNT(*), SUM(correct = 1)
+FROM word_review_items
+GROUP BY word_id;
+
+INSERT OR REPLACE INTO counters (name, scope_id, value)
+SELECT 'review_items', 0, COUNT(*) FROM word_review_items;
+
+INSERT OR REPLACE INTO counters (name, scope_id, value)
+SELECT 'review_items_correct', 0, COUNT(*) FROM word_review_items WHERE correct = 1;
+
+INSERT OR REPLACE INTO counters (name, scope_id, value)
+SELECT 'words_studied', 0, COUNT(*) FROM word_mastery;
+
+INSERT OR REPLACE INTO counters (name, scope_id, value)
+SELECT 'mastered_words', 0, COUNT(*) FROM word_mastery
+WHERE attempts >= 5 AND correct_count * 1.0 / attempts >= 0.8;
+
+-- word_review_items -> daily_study_stats, word_mastery, counters
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_rollups
+AFTER INSERT ON word_review_items
+BEGIN
+  INSERT INTO daily_study_stats (study_date, reviews_count, correct_count, wrong_count)
+  VALUES (COALESCE(date(NEW.created_at), date('now')), 1, NEW.correct = 1, NEW.correct = 0)
+  ON CONFLICT (study_date) DO UPDATE SET
+    reviews_count = reviews_count + 1,
+    correct_count = correct_count + excluded.correct_count,
+    wrong_count = wrong_count + excluded.wrong_count;
+
+  INSERT INTO word_mastery (word_id, attempts, correct_count)
+  VALUES (NEW.word_id, 1, NEW.correct = 1)
+  ON CONFLICT (word_id) DO UPDATE SET
+    attempts = attempts + 1,
+    correct_count = correct_count + excluded.correct_count;
+
+  UPDATE counters SET value = value + 1 WHERE name = 'review_items' AND scope_id = 0;
+  UPDATE counters SET value = value + (NEW.correct = 1) WHERE name = 'review_items_correct' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_rollups
+AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE daily_study_stats SET
+    reviews_count = reviews_count - 1,
+    correct_count = correct_count - (OLD.correct = 1),
+    wrong_count = wrong_count - (OLD.correct = 0)
+  WHERE study_date = date(OLD.created_at);
+
+  UPDATE word_mastery SET
+    attempts = attempts - 1,
+    correct_count = correct_count - (OLD.correct = 1)
+  WHERE word_id = OLD.word_id;
+  DELETE FROM word_mastery WHERE word_id = OLD.word_id AND attempts <= 0;
+
+  UPDATE counters SET value = value - 1 WHERE name = 'review_items' AND scope_id = 0;
+  UPDATE counters SET value = value - (OLD.correct = 1) WHERE name = 'review_items_correct' AND scope_id = 0;
+END;
+
+-- word_mastery -> words_studied / mastered_words counters
+CREATE TRIGGER IF NOT EXISTS trg_word_mastery_insert_count
+AFTER INSERT ON word_mastery
+BEGIN
+  UPDATE counters SET value = value + 1 WHERE name = 'words_studied' AND scope_id = 0;
+  UPDATE counters SET value = value + (NEW.attempts >= 5 AND NEW.correct_count * 1.0 / NEW.attempts >= 0.8)
+  WHERE name = 'mastered_words' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_mastery_update_count
+AFTER UPDATE ON word_mastery
+BEGIN
+  UPDATE counters SET value = value
+    + (NEW.attempts >= 5 AND NEW.correct_count * 1.0 / NEW.attempts >= 0.8)
+    - (OLD.attempts >= 5 AND OLD.correct_count * 1.0 / OLD.attempts >= 0.8)
+  WHERE name = 'mastered_words' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_mastery_delete_count
+AFTER DELETE ON word_mastery
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'words_studied' AND scope_id = 0;
+  UPDATE counters SET value = value - (OLD.attempts >= 5 AND OLD.correct_count * 1.0 / OLD.attempts >= 0.8)
+  WHERE name = 'mastered_words' AND scope_id = 0;
+END;
+
+-- study_sessions -> daily_study_stats, daily_group_activity
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_rollups
+AFTER INSERT ON study_sessions
+BEGIN
+  INSERT INTO daily_study_stats (study_date, sessions_count)
+  VALUES (COALESCE(date(NEW.created_at), date('now')), 1)
+  ON CONFLICT (study_date) DO UPDATE SET sessions_count = sessions_count + 1;
+
+  INSERT INTO daily_group_activity (study_date, group_id, sessions_count)
+  VALUES (COALESCE(date(NEW.created_at), date('now')), NEW.group_id, 1)
+  ON CONFLICT (study_date, group_id) DO UPDATE SET sessions_count = sessions_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_rollups
+AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE daily_study_stats SET sessions_count = sessions_count - 1
+  WHERE study_date = date(OLD.created_at);
+
+  UPDATE daily_group_activity SET sessions_count = sessions_count - 1
+  WHERE study_date = date(OLD.created_at) AND group_id = OLD.group_id;
+END;
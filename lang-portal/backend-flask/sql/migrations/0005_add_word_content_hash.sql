@@ -0,0 +1,16 @@
+-- Content hash used to de-duplicate words on import (see lib/seed.py).
+-- word_hash() is registered on every connection by lib/db.py.
+
+ALTER TABLE words ADD COLUMN content_hash TEXT;
+
+-- Databases seeded more than once contain duplicate words. Only the oldest
+-- copy gets a hash (and is updated by later imports); the others keep NULL so
+-- their review history is left untouched.
+UPDATE words
+SET content_hash = word_hash(kanji, romaji, english)
+WHERE id IN (SELECT MIN(id) FROM words GROUP BY kanji, romaji, english);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_words_content_hash ON words (content_hash);
+
+-- Group lookup by name when importing
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups (name);
@@ -0,0 +1,67 @@
+-- Per-session review summaries stored on study_sessions and maintained by
+-- triggers on word_review_items, so session listings no longer aggregate
+-- word_review_items per row.
+--
+--   review_count / correct_count / wrong_count  answers recorded in the session
+--   last_activity_at                            time of the latest answer
+--   ended_at                                    last_activity_at, or created_at + 30 minutes
+--                                               while the session has no answers
+
+ALTER TABLE study_sessions ADD COLUMN review_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN correct_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN wrong_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN last_activity_at DATETIME;
+ALTER TABLE study_sessions ADD COLUMN ended_at DATETIME;
+
+-- Backfill from the existing history
+UPDATE study_sessions SET
+  review_count = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id),
+  correct_count = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id AND correct = 1),
+  wrong_count = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id AND correct = 0),
+  last_activity_at = (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = study_sessions.id);
+
+UPDATE study_sessions SET ended_at = COALESCE(last_activity_at, datetime(created_at, '+30 minutes'));
+
+-- Indexed sorts for /api/groups/<id>/study_sessions (endTime, reviewItemsCount)
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_ended ON study_sessions (group_id, ended_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_review_count ON study_sessions (group_id, review_count);
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_summary
+AFTER INSERT ON study_sessions
+BEGIN
+  UPDATE study_sessions
+  SET ended_at = COALESCE(last_activity_at, datetime(NEW.created_at, '+30 minutes'))
+  WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_summary
+AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE study_sessions SET
+    review_count = review_count + 1,
+    correct_count = correct_count + (NEW.correct = 1),
+    wrong_count = wrong_count + (NEW.correct = 0),
+    last_activity_at = CASE
+      WHEN last_activity_at IS NULL OR NEW.created_at > last_activity_at THEN NEW.created_at
+      ELSE last_activity_at
+    END,
+    ended_at = CASE
+      WHEN last_activity_at IS NULL OR NEW.created_at > last_activity_at THEN NEW.created_at
+      ELSE last_activity_at
+    END
+  WHERE id = NEW.study_session_id;
+END;
+
+-- Deleting answers keeps last_activity_at unless the session has none left
+-- (answers are only deleted together with their session today)
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_summary
+AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE study_sessions SET
+    review_count = review_count - 1,
+    correct_count = correct_count - (OLD.correct = 1),
+    wrong_count = wrong_count - (OLD.correct = 0),
+    last_activity_at = CASE WHEN review_count <= 1 THEN NULL ELSE last_activity_at END,
+    ended_at = CASE WHEN review_count <= 1 THEN datetime(created_at, '+30 minutes') ELSE ended_at END
+  WHERE id = OLD.study_session_id;
+END;
@@ -0,0 +1,151 @@
+-- Per-table change versions, bumped by triggers on every write, so GET
+-- routes can build an ETag / Last-Modified without running their queries
+-- (see lib/conditional.py).
+
+CREATE TABLE IF NOT EXISTS table_versions (
+  name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO table_versions (name) VALUES
+  ('words'),
+  ('groups'),
+  ('word_groups'),
+  ('study_activities'),
+  ('study_sessions'),
+  ('word_review_items'),
+  ('word_reviews');
+
+-- words
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_version
+AFTER INSERT ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_update_version
+AFTER UPDATE ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_version
+AFTER DELETE ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'words';
+END;
+
+-- groups
+CREATE TRIGGER IF NOT EXISTS trg_groups_insert_version
+AFTER INSERT ON groups
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_update_version
+AFTER UPDATE ON groups
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_delete_version
+AFTER DELETE ON groups
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+-- word_groups
+CREATE TRIGGER IF NOT EXISTS trg_word_groups_insert_version
+AFTER INSERT ON word_groups
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_groups_update_version
+AFTER UPDATE ON word_groups
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_groups_delete_version
+AFTER DELETE ON word_groups
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_groups';
+END;
+
+-- study_activities
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_insert_version
+AFTER INSERT ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_update_version
+AFTER UPDATE ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_delete_version
+AFTER DELETE ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+-- study_sessions
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_version
+AFTER INSERT ON study_sessions
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_update_version
+AFTER UPDATE ON study_sessions
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_version
+AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_sessions';
+END;
+
+-- word_review_items
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_insert_version
+AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_update_version
+AFTER UPDATE ON word_review_items
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_version
+AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_review_items';
+END;
+
+-- word_reviews
+CREATE TRIGGER IF NOT EXISTS trg_word_reviews_insert_version
+AFTER INSERT ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_reviews_update_version
+AFTER UPDATE ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_reviews_delete_version
+AFTER DELETE ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
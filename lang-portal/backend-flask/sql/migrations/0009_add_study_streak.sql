@@ -0,0 +1,65 @@
+-- Study streak state for /dashboard/stats, updated in O(1) by a trigger on
+-- study_sessions instead of scanning every study day on each request.
+--
+--   current_streak   consecutive study days in the run ending at last_study_date
+--   longest_streak   longest run of consecutive study days
+--   last_study_date  most recent day with a session (YYYY-MM-DD)
+--
+-- The dashboard reports a current streak of 0 once last_study_date is older
+-- than yesterday. Sessions inserted for a day before last_study_date do not
+-- change the streak; `invoke rebuild-stats` recomputes it from history.
+
+CREATE TABLE IF NOT EXISTS study_streak (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  current_streak INTEGER NOT NULL DEFAULT 0,
+  longest_streak INTEGER NOT NULL DEFAULT 0,
+  last_study_date TEXT
+);
+
+-- Backfill from the existing history: runs of consecutive days share the same
+-- julianday(study_date) - row_number()
+INSERT OR REPLACE INTO study_streak (id, current_streak, longest_streak, last_study_date)
+WITH days AS (
+  SELECT study_date,
+         julianday(study_date) - ROW_NUMBER() OVER (ORDER BY study_date) AS run
+  FROM daily_study_stats
+  WHERE sessions_count > 0
+),
+runs AS (
+  SELECT MAX(study_date) AS last_date, COUNT(*) AS days
+  FROM days
+  GROUP BY run
+)
+SELECT 1,
+       COALESCE((SELECT days FROM runs ORDER BY last_date DESC LIMIT 1), 0),
+       COALESCE((SELECT MAX(days) FROM runs), 0),
+       (SELECT MAX(last_date) FROM runs);
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_streak
+AFTER INSERT ON study_sessions
+BEGIN
+  UPDATE study_streak SET
+    current_streak = CASE
+      WHEN last_study_date IS NULL THEN 1
+      WHEN COALESCE(date(NEW.created_at), date('now')) <= last_study_date THEN current_streak
+      WHEN COALESCE(date(NEW.created_at), date('now')) = date(last_study_date, '+1 day') THEN current_streak + 1
+      ELSE 1
+    END,
+    longest_streak = MAX(longest_streak, CASE
+      WHEN last_study_date IS NULL THEN 1
+      WHEN COALESCE(date(NEW.created_at), date('now')) <= last_study_date THEN current_streak
+      WHEN COALESCE(date(NEW.created_at), date('now')) = date(last_study_date, '+1 day') THEN current_streak + 1
+      ELSE 1
+    END),
+    last_study_date = MAX(COALESCE(last_study_date, ''), COALESCE(date(NEW.created_at), date('now')))
+  WHERE id = 1;
+END;
+
+-- Clearing the study history clears the streak
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_streak
+AFTER DELETE ON study_sessions
+WHEN NOT EXISTS (SELECT 1 FROM study_sessions)
+BEGIN
+  UPDATE study_streak SET current_streak = 0, longest_streak = 0, last_study_date = NULL
+  WHERE id = 1;
+END;
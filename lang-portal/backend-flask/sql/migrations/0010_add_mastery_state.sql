@@ -0,0 +1,45 @@
+-- Mastery classification derived from the per-word totals in word_reviews.
+-- mastery_state is a generated column, so it is recomputed whenever
+-- correct_count/wrong_count change, and its index turns "mastered words" into
+-- an index range count and backs GET /api/words/mastered and /struggling.
+--
+--   new         never reviewed
+--   mastered    at least 5 reviews and at least 80% correct
+--   struggling  at least 3 reviews and more wrong than correct answers
+--   learning    everything else
+
+ALTER TABLE word_reviews ADD COLUMN mastery_state TEXT GENERATED ALWAYS AS (
+  CASE
+    WHEN COALESCE(correct_count, 0) + COALESCE(wrong_count, 0) = 0 THEN 'new'
+    WHEN correct_count + wrong_count >= 5
+         AND correct_count * 1.0 / (correct_count + wrong_count) >= 0.8 THEN 'mastered'
+    WHEN correct_count + wrong_count >= 3 AND wrong_count > correct_count THEN 'struggling'
+    ELSE 'learning'
+  END
+) VIRTUAL;
+
+-- SQLite appends the rowid (word_id) to the index, so each state is listed in
+-- word_id order straight from the index
+CREATE INDEX IF NOT EXISTS idx_word_reviews_mastery_state ON word_reviews (mastery_state);
+
+-- The dashboard now counts mastered words through the index; stop
+-- maintaining the mastered_words counter (see 0004_add_rollups.sql)
+DROP TRIGGER IF EXISTS trg_word_mastery_update_count;
+DROP TRIGGER IF EXISTS trg_word_mastery_insert_count;
+DROP TRIGGER IF EXISTS trg_word_mastery_delete_count;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_mastery_insert_count
+AFTER INSERT ON word_mastery
+BEGIN
+  UPDATE counters SET value = value + 1 WHERE name = 'words_studied' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_mastery_delete_count
+AFTER DELETE ON word_mastery
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'words_studied' AND scope_id = 0;
+END;
+
+DELETE FROM counters WHERE name = 'mastered_words';
+
+ANALYZE word_reviews;
@@ -0,0 +1,60 @@
+-- Spaced-repetition scheduling (SM-2, see lib/scheduler.py).
+--
+-- word_schedule holds each reviewed word's SM-2 state and is written by
+-- record_review_items together with the review results. next_due_at is copied
+-- to every word_groups row of the word, so GET /api/groups/<id>/due reads the
+-- next cards of a group straight from the (group_id, next_due_at) index.
+-- Words that were never scheduled are due from the epoch, i.e. immediately.
+-- Existing review history is not replayed: every word starts unscheduled.
+
+CREATE TABLE IF NOT EXISTS word_schedule (
+  word_id INTEGER PRIMARY KEY,
+  repetitions INTEGER NOT NULL DEFAULT 0,   -- successful reviews in a row
+  interval_days REAL NOT NULL DEFAULT 0,
+  ease REAL NOT NULL DEFAULT 2.5,
+  last_reviewed_at DATETIME,
+  next_due_at DATETIME NOT NULL,
+  FOREIGN KEY (word_id) REFERENCES words(id)
+);
+
+ALTER TABLE word_groups ADD COLUMN next_due_at DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00';
+
+CREATE INDEX IF NOT EXISTS idx_word_groups_group_due ON word_groups (group_id, next_due_at);
+
+-- word_schedule -> word_groups.next_due_at
+CREATE TRIGGER IF NOT EXISTS trg_word_schedule_insert_due
+AFTER INSERT ON word_schedule
+BEGIN
+  UPDATE word_groups SET next_due_at = NEW.next_due_at WHERE word_id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_schedule_update_due
+AFTER UPDATE OF next_due_at ON word_schedule
+BEGIN
+  UPDATE word_groups SET next_due_at = NEW.next_due_at WHERE word_id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_schedule_delete_due
+AFTER DELETE ON word_schedule
+BEGIN
+  UPDATE word_groups SET next_due_at = '1970-01-01 00:00:00' WHERE word_id = OLD.word_id;
+END;
+
+-- A word added to another group keeps its schedule
+CREATE TRIGGER IF NOT EXISTS trg_word_groups_insert_due
+AFTER INSERT ON word_groups
+WHEN EXISTS (SELECT 1 FROM word_schedule WHERE word_id = NEW.word_id)
+BEGIN
+  UPDATE word_groups SET next_due_at = (SELECT next_due_at FROM word_schedule WHERE word_id = NEW.word_id)
+  WHERE rowid = NEW.rowid;
+END;
+
+-- Rescheduling is not a membership change: only bump the word_groups version
+-- (see 0007_add_table_versions.sql) when the membership columns change
+DROP TRIGGER IF EXISTS trg_word_groups_update_version;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_groups_update_version
+AFTER UPDATE OF word_id, group_id ON word_groups
+BEGIN
+  UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_groups';
+END;
@@ -0,0 +1,93 @@
+-- Normalized word parts and pre-serialized word JSON, both derived from
+-- words.parts by triggers.
+--
+--   word_parts    one row per part (kanji/kana + its romaji readings as a JSON
+--                 array); indexed on kanji for GET /api/words/by-part
+--   word_exports  each word as compact JSON ({"id","kanji","romaji","english",
+--                 "parts"}), so /api/groups/<id>/words/raw concatenates stored
+--                 strings instead of decoding and re-encoding parts per row
+--
+-- Rebuilt from words by sql/maintenance/rebuild_word_indexes.sql.
+
+CREATE TABLE IF NOT EXISTS word_parts (
+  word_id INTEGER NOT NULL,
+  position INTEGER NOT NULL,
+  kanji TEXT NOT NULL,
+  romaji TEXT NOT NULL,  -- JSON array of readings
+  PRIMARY KEY (word_id, position),
+  FOREIGN KEY (word_id) REFERENCES words(id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_word_parts_kanji ON word_parts (kanji, word_id);
+
+CREATE TABLE IF NOT EXISTS word_exports (
+  word_id INTEGER PRIMARY KEY,
+  json TEXT NOT NULL,
+  FOREIGN KEY (word_id) REFERENCES words(id)
+);
+
+-- Backfill from the existing words
+INSERT OR REPLACE INTO word_parts (word_id, position, kanji, romaji)
+SELECT w.id, p.key, COALESCE(json_extract(p.value, '$.kanji'), ''),
+       CASE json_type(p.value, '$.romaji')
+         WHEN 'array' THEN json_extract(p.value, '$.romaji')
+         WHEN 'text' THEN json_array(json_extract(p.value, '$.romaji'))
+         ELSE '[]'
+       END
+FROM words w, json_each(CASE WHEN json_valid(w.parts) THEN w.parts ELSE '[]' END) p;
+
+INSERT OR REPLACE INTO word_exports (word_id, json)
+SELECT id, json_object('id', id, 'kanji', kanji, 'romaji', romaji, 'english', english,
+                       'parts', json(CASE WHEN json_valid(parts) THEN parts ELSE '[]' END))
+FROM words;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_parts
+AFTER INSERT ON words
+BEGIN
+  INSERT INTO word_parts (word_id, position, kanji, romaji)
+  SELECT NEW.id, p.key, COALESCE(json_extract(p.value, '$.kanji'), ''),
+         CASE json_type(p.value, '$.romaji')
+           WHEN 'array' THEN json_extract(p.value, '$.romaji')
+           WHEN 'text' THEN json_array(json_extract(p.value, '$.romaji'))
+           ELSE '[]'
+         END
+  FROM json_each(CASE WHEN json_valid(NEW.parts) THEN NEW.parts ELSE '[]' END) p;
+
+  INSERT INTO word_exports (word_id, json)
+  VALUES (NEW.id, json_object('id', NEW.id, 'kanji', NEW.kanji, 'romaji', NEW.romaji, 'english', NEW.english,
+                              'parts', json(CASE WHEN json_valid(NEW.parts) THEN NEW.parts ELSE '[]' END)))
+  ON CONFLICT (word_id) DO UPDATE SET json = excluded.json;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_update_parts
+AFTER UPDATE OF parts ON words
+BEGIN
+  DELETE FROM word_parts WHERE word_id = OLD.id;
+
+  INSERT INTO word_parts (word_id, position, kanji, romaji)
+  SELECT NEW.id, p.key, COALESCE(json_extract(p.value, '$.kanji'), ''),
+         CASE json_type(p.value, '$.romaji')
+           WHEN 'array' THEN json_extract(p.value, '$.romaji')
+           WHEN 'text' THEN json_array(json_extract(p.value, '$.romaji'))
+           ELSE '[]'
+         END
+  FROM json_each(CASE WHEN json_valid(NEW.parts) THEN NEW.parts ELSE '[]' END) p;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_update_export
+AFTER UPDATE OF kanji, romaji, english, parts ON words
+BEGIN
+  INSERT INTO word_exports (word_id, json)
+  VALUES (NEW.id, json_object('id', NEW.id, 'kanji', NEW.kanji, 'romaji', NEW.romaji, 'english', NEW.english,
+                              'parts', json(CASE WHEN json_valid(NEW.parts) THEN NEW.parts ELSE '[]' END)))
+  ON CONFLICT (word_id) DO UPDATE SET json = excluded.json;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_parts
+AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_parts WHERE word_id = OLD.id;
+  DELETE FROM word_exports WHERE word_id = OLD.id;
+END;
+
+ANALYZE word_parts;
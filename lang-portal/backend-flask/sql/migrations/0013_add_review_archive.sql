@@ -0,0 +1,102 @@
+-- Cold storage for old review answers (see Db.archive_review_items and
+-- `invoke archive-reviews`).
+--
+-- Every answer is already folded into the rollups (daily_study_stats,
+-- word_mastery, counters, session summaries, word_reviews) when it is
+-- recorded. Archiving moves answers from word_review_items to
+-- word_review_items_archive with archive_control.active set, which disables
+-- the delete triggers that would otherwise subtract them, so stats stay exact
+-- while word_review_items only holds the recent answers.
+--
+-- Deleting archived answers (clearing the study history) subtracts them from
+-- the rollups like deleting recent ones does.
+
+CREATE TABLE IF NOT EXISTS word_review_items_archive (
+  id INTEGER PRIMARY KEY,
+  word_id INTEGER NOT NULL,
+  study_session_id INTEGER NOT NULL,
+  correct BOOLEAN NOT NULL,
+  created_at DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_review_items_archive_session ON word_review_items_archive (study_session_id, word_id);
+
+-- Recent and archived answers together, for queries that need the full
+-- history (session detail with include_archived, rebuild_rollups.sql)
+CREATE VIEW IF NOT EXISTS all_word_review_items AS
+SELECT id, word_id, study_session_id, correct, created_at FROM word_review_items
+UNION ALL
+SELECT id, word_id, study_session_id, correct, created_at FROM word_review_items_archive;
+
+CREATE TABLE IF NOT EXISTS archive_control (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  active INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO archive_control (id, active) VALUES (1, 0);
+
+-- Recreate the delete triggers of 0004_add_rollups.sql and
+-- 0006_add_session_summaries.sql so they skip answers being archived
+DROP TRIGGER IF EXISTS trg_word_review_items_delete_rollups;
+DROP TRIGGER IF EXISTS trg_word_review_items_delete_summary;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_rollups
+AFTER DELETE ON word_review_items
+WHEN (SELECT active FROM archive_control WHERE id = 1) = 0
+BEGIN
+  UPDATE daily_study_stats SET
+    reviews_count = reviews_count - 1,
+    correct_count = correct_count - (OLD.correct = 1),
+    wrong_count = wrong_count - (OLD.correct = 0)
+  WHERE study_date = date(OLD.created_at);
+
+  UPDATE word_mastery SET
+    attempts = attempts - 1,
+    correct_count = correct_count - (OLD.correct = 1)
+  WHERE word_id = OLD.word_id;
+  DELETE FROM word_mastery WHERE word_id = OLD.word_id AND attempts <= 0;
+
+  UPDATE counters SET value = value - 1 WHERE name = 'review_items' AND scope_id = 0;
+  UPDATE counters SET value = value - (OLD.correct = 1) WHERE name = 'review_items_correct' AND scope_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_delete_summary
+AFTER DELETE ON word_review_items
+WHEN (SELECT active FROM archive_control WHERE id = 1) = 0
+BEGIN
+  UPDATE study_sessions SET
+    review_count = review_count - 1,
+    correct_count = correct_count - (OLD.correct = 1),
+    wrong_count = wrong_count - (OLD.correct = 0),
+    last_activity_at = CASE WHEN review_count <= 1 THEN NULL ELSE last_activity_at END,
+    ended_at = CASE WHEN review_count <= 1 THEN datetime(created_at, '+30 minutes') ELSE ended_at END
+  WHERE id = OLD.study_session_id;
+END;
+
+-- Deleting archived answers removes them from the stats
+CREATE TRIGGER IF NOT EXISTS trg_word_review_items_archive_delete_rollups
+AFTER DELETE ON word_review_items_archive
+BEGIN
+  UPDATE daily_study_stats SET
+    reviews_count = reviews_count - 1,
+    correct_count = correct_count - (OLD.correct = 1),
+    wrong_count = wrong_count - (OLD.correct = 0)
+  WHERE study_date = date(OLD.created_at);
+
+  UPDATE word_mastery SET
+    attempts = attempts - 1,
+    correct_count = correct_count - (OLD.correct = 1)
+  WHERE word_id = OLD.word_id;
+  DELETE FROM word_mastery WHERE word_id = OLD.word_id AND attempts <= 0;
+
+  UPDATE counters SET value = value - 1 WHERE name = 'review_items' AND scope_id = 0;
+  UPDATE counters SET value = value - (OLD.correct = 1) WHERE name = 'review_items_correct' AND scope_id = 0;
+
+  UPDATE study_sessions SET
+    review_count = review_count - 1,
+    correct_count = correct_count - (OLD.correct = 1),
+    wrong_count = wrong_count - (OLD.correct = 0),
+    last_activity_at = CASE WHEN review_count <= 1 THEN NULL ELSE last_activity_at END,
+    ended_at = CASE WHEN review_count <= 1 THEN datetime(created_at, '+30 minutes') ELSE ended_at END
+  WHERE id = OLD.study_session_id;
+END;
@@ -0,0 +1,6 @@
+-- Per-word history in the archive, as idx_word_review_items_word_created is
+-- for recent answers. A study history reset recomputes the totals and the
+-- schedule of the words it touched a batch of words at a time, which would
+-- otherwise scan the whole archive once per batch.
+CREATE INDEX IF NOT EXISTS idx_word_review_items_archive_word_created
+  ON word_review_items_archive (word_id, created_at);
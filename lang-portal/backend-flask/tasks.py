@@ -6,4 +6,116 @@ def init_db(c):
   from flask import Flask
   app = Flask(__name__)
   db.init(app)
-  print("Database initialized successfully.")
\ No newline at end of file
+  print("Database initialized successfully.")
+
+@task(help={
+  'path': 'JSON file with an array of words (kanji, romaji, english, parts)',
+  'group': 'Name of the group to add the words to (created if missing)',
+  'batch_size': 'Number of words written per executemany batch'
+})
+def import_words(c, path, group, batch_size=1000):
+  from flask import Flask
+  app = Flask(__name__)
+  with app.app_context():
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    db.import_word_json(
+      cursor=cursor,
+      group_name=group,
+      data_json_path=path,
+      batch_size=int(batch_size)
+    )
+
+@task
+def migrate(c):
+  from flask import Flask
+  app = Flask(__name__)
+  with app.app_context():
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    print(f"Database schema is at version {db.schema_version(cursor)}.")
+
+@task
+def rebuild_stats(c):
+  from flask import Flask
+  app = Flask(__name__)
+  with app.app_context():
+    db.rebuild_rollups(db.cursor())
+    print("Counters and dashboard rollups rebuilt successfully.")
+
+@task(help={
+  'path': 'Database file to create',
+  'words': 'Number of words',
+  'groups': 'Number of groups',
+  'sessions': 'Number of study sessions',
+  'review_items': 'Number of word review items',
+  'seed': 'Random seed',
+  'force': 'Overwrite the database file if it exists'
+})
+def generate_dataset(c, path='bench.db', words=100000, groups=1000, sessions=100000,
+                     review_items=1000000, seed=42, force=False):
+  from flask import Flask
+  from bench.dataset import generate
+  app = Flask(__name__)
+  generate(app, path, words=int(words), groups=int(groups), sessions=int(sessions),
+           review_items=int(review_items), seed=int(seed), force=force)
+
+@task(help={
+  'path': 'Database file to benchmark (see generate-dataset)',
+  'requests': 'Measured requests per endpoint',
+  'writes': 'Also benchmark the write endpoints (modifies the database)',
+  'output': 'Optional JSON file for the results'
+})
+def bench(c, path='bench.db', requests=50, writes=False, output=None):
+  from bench.endpoints import run
+  run(path, requests=int(requests), include_writes=writes, output=output)
+
+@task(help={
+  'path': 'Database file to benchmark (see generate-dataset)',
+  'requests': 'Measured requests per endpoint and serializer',
+  'output': 'Optional JSON file for the results'
+})
+def bench_serialization(c, path='bench.db', requests=200, output=None):
+  from bench.serialization import run
+  run(path, requests=int(requests), output=output)
+
+@task(help={
+  'older_than_days': 'Archive review items recorded more than this many days ago',
+  'batch_size': 'Review items moved per transaction'
+})
+def archive_reviews(c, older_than_days=90, batch_size=10000):
+  from flask import Flask
+  app = Flask(__name__)
+  with app.app_context():
+    cursor = db.cursor()
+    db.setup_tables(cursor)
+    summary = db.archive_review_items(cursor, older_than_days=int(older_than_days), batch_size=int(batch_size))
+    print(f"Archived {summary['archived']} review items older than {older_than_days} days in {summary['elapsed_seconds']:.2f}s.")
+
+@task(help={
+  'path': 'Snapshot file to write (".gz" is appended with --compress)',
+  'pages': 'Pages copied per step; writers get the lock between steps',
+  'compress': 'gzip the snapshot',
+  'verify': 'Run PRAGMA integrity_check on the snapshot'
+})
+def backup(c, path='words-backup.db', pages=1024, compress=False, verify=True):
+  from lib.backup import backup_database
+  if compress and not path.endswith('.gz'):
+    path += '.gz'
+  source = db.connect()
+  try:
+    summary = backup_database(source, path, pages=int(pages), compress=compress, verify=verify)
+  finally:
+    source.close()
+  print(f"Backed up {db.database} to {summary['path']} ({summary['bytes']} bytes) in {summary['elapsed_seconds']:.2f}s.")
+
+@task(help={
+  'source': 'Snapshot to restore (plain or gzipped)',
+  'path': 'Database file to create',
+  'force': 'Overwrite the database file if it exists',
+  'verify': 'Run PRAGMA integrity_check on the restored file'
+})
+def restore(c, source, path='words.db', force=False, verify=True):
+  from lib.backup import restore_database
+  summary = restore_database(source, path, force=force, verify=verify)
+  print(f"Restored {source} to {summary['path']} in {summary['elapsed_seconds']:.2f}s.")
@@ -0,0 +1,86 @@
+import shutil
+import sqlite3
+import time
+
+import pytest
+from flask import Flask
+
+from app import create_app
+from bench.dataset import generate
+
+# Every test gets its own copy of one small generated database (see
+# bench/dataset.py): a year of sessions and answers with rollups rebuilt.
+
+@pytest.fixture(scope='session')
+def dataset(tmp_path_factory):
+  path = str(tmp_path_factory.mktemp('dataset') / 'words.db')
+  generate(Flask(__name__), path, words=300, groups=10, sessions=400, review_items=4000,
+           activities=3, days=365, seed=7, batch_size=1000)
+  return path
+
+@pytest.fixture
+def database(dataset, tmp_path):
+  path = str(tmp_path / 'words.db')
+  shutil.copy(dataset, path)
+  return path
+
+@pytest.fixture
+def app(database):
+  return create_app({'DATABASE': database, 'RESET_BATCH_SIZE': 100})
+
+@pytest.fixture
+def client(app):
+  return app.test_client()
+
+# Query the test database on a connection of its own
+@pytest.fixture
+def query(database):
+  connection = sqlite3.connect(database)
+  yield lambda sql, params=(): connection.execute(sql, params).fetchall()
+  connection.close()
+
+# Every trigger-maintained counter and rollup, for comparing states
+@pytest.fixture
+def rollups(query):
+  def snapshot():
+    return {
+      "counters": query('SELECT name, scope_id, value FROM counters ORDER BY name, scope_id'),
+      "daily_study_stats": query('SELECT * FROM daily_study_stats ORDER BY study_date'),
+      "daily_group_activity": query('SELECT * FROM daily_group_activity ORDER BY study_date, group_id'),
+      "word_mastery": query('SELECT * FROM word_mastery ORDER BY word_id'),
+      "study_streak": query('SELECT * FROM study_streak'),
+      "study_sessions": query('''
+        SELECT id, review_count, correct_count, wrong_count, last_activity_at, ended_at
+        FROM study_sessions ORDER BY id
+      '''),
+      "word_reviews": query('''
+        SELECT word_id, correct_count, wrong_count, last_reviewed
+        FROM word_reviews ORDER BY word_id
+      ''')
+    }
+  return snapshot
+
+# Recompute every rollup from the base tables (invoke rebuild-stats)
+@pytest.fixture
+def rebuild(app):
+  def run():
+    connection = app.db.connect()
+    try:
+      app.db.rebuild_rollups(connection.cursor())
+    finally:
+      connection.close()
+  return run
+
+# Poll GET /api/jobs/<id> for the job started by `response`
+@pytest.fixture
+def wait_for_job(client):
+  def wait(response, timeout=30):
+    assert response.status_code == 202, response.get_json()
+    deadline = time.monotonic() + timeout
+    while True:
+      job = client.get(response.get_json()['status_url']).get_json()
+      if job['status'] in ('succeeded', 'failed'):
+        return job
+      assert time.monotonic() < deadline, job
+      time.sleep(0.02)
+  return wait
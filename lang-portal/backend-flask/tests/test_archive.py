@@ -0,0 +1,40 @@
+def archive(app, older_than_days=90, batch_size=500):
+  connection = app.db.connect()
+  try:
+    return app.db.archive_review_items(connection.cursor(), older_than_days=older_than_days,
+                                       batch_size=batch_size)
+  finally:
+    connection.close()
+
+def test_archiving_keeps_rollups(app, query, rollups, rebuild):
+  before = rollups()
+  total = query('SELECT COUNT(*) FROM word_review_items')[0][0]
+
+  summary = archive(app)
+
+  assert summary["archived"] > 0
+  assert query('SELECT COUNT(*) FROM word_review_items_archive')[0][0] == summary["archived"]
+  assert query('SELECT COUNT(*) FROM all_word_review_items')[0][0] == total
+  assert query('''
+    SELECT COUNT(*) FROM word_review_items WHERE created_at < datetime('now', '-90 days')
+  ''')[0][0] == 0
+  assert rollups() == before
+
+  rebuild()
+  assert rollups() == before
+
+def test_session_detail_includes_archived_answers(app, client, query):
+  archive(app)
+  session_id = query('SELECT study_session_id FROM word_review_items_archive LIMIT 1')[0][0]
+  words = {row[0] for row in query('''
+    SELECT word_id FROM all_word_review_items WHERE study_session_id = ?
+  ''', (session_id,))}
+  recent = {row[0] for row in query('''
+    SELECT word_id FROM word_review_items WHERE study_session_id = ?
+  ''', (session_id,))}
+
+  default = client.get(f'/api/study-sessions/{session_id}?per_page=100').get_json()
+  archived = client.get(f'/api/study-sessions/{session_id}?include_archived=1&per_page=100').get_json()
+
+  assert {word['id'] for word in default['words']} == recent
+  assert {word['id'] for word in archived['words']} == words
@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+from app import create_app
+from lib.backup import backup_database, restore_database
+
+def test_gzipped_backup_restores(app, query, tmp_path):
+  snapshot = str(tmp_path / 'snapshot.db.gz')
+  restored = str(tmp_path / 'restored.db')
+
+  source = app.db.connect()
+  try:
+    summary = backup_database(source, snapshot, pages=16, compress=True)
+  finally:
+    source.close()
+  assert summary['compressed'] and summary['verified']
+  with open(snapshot, 'rb') as file:
+    assert file.read(2) == b'\x1f\x8b'
+
+  restore_database(snapshot, restored)
+
+  connection = sqlite3.connect(restored)
+  try:
+    assert connection.execute('PRAGMA integrity_check').fetchall() == [('ok',)]
+    for table in ('words', 'study_sessions', 'word_review_items', 'counters'):
+      count = connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+      assert count == query(f'SELECT COUNT(*) FROM {table}')[0][0]
+  finally:
+    connection.close()
+
+def test_restore_refuses_to_overwrite(database):
+  with pytest.raises(FileExistsError):
+    restore_database(database, database)
+
+def test_admin_backup_requires_token(database):
+  assert create_app({'DATABASE': database}).test_client().post('/api/admin/backup').status_code == 404
+
+  client = create_app({'DATABASE': database, 'ADMIN_TOKEN': 'secret'}).test_client()
+  assert client.post('/api/admin/backup').status_code == 401
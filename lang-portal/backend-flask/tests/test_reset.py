@@ -0,0 +1,89 @@
+import pytest
+
+SCHEMA = 'SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name'
+
+def reset(client, wait_for_job, **body):
+  job = wait_for_job(client.post('/api/study-sessions/reset', json=body))
+  assert job['status'] == 'succeeded', job['error']
+  return job
+
+@pytest.mark.parametrize('scope', ['group_id', 'study_activity_id'])
+def test_scoped_reset_keeps_rollups_consistent(client, query, rollups, rebuild, wait_for_job, scope):
+  scope_id, sessions = query(f'''
+    SELECT {scope}, COUNT(*) FROM study_sessions GROUP BY {scope} ORDER BY 2 DESC LIMIT 1
+  ''')[0]
+  others = query(f'SELECT COUNT(*) FROM study_sessions WHERE {scope} <> ?', (scope_id,))[0][0]
+
+  job = reset(client, wait_for_job, **{scope: scope_id})
+
+  assert job['result']['study_sessions_deleted'] == sessions
+  assert query(f'SELECT COUNT(*) FROM study_sessions WHERE {scope} = ?', (scope_id,))[0][0] == 0
+  assert query('SELECT COUNT(*) FROM study_sessions')[0][0] == others
+  assert query('''
+    SELECT COUNT(*) FROM all_word_review_items
+    WHERE study_session_id NOT IN (SELECT id FROM study_sessions)
+  ''')[0][0] == 0
+
+  after_reset = rollups()
+  rebuild()
+  assert rollups() == after_reset
+
+@pytest.mark.parametrize('fast', [False, True])
+def test_full_reset_clears_history(client, query, rollups, rebuild, wait_for_job, fast):
+  reset(client, wait_for_job, fast=fast)
+
+  for table in ('study_sessions', 'word_review_items', 'word_review_items_archive', 'word_schedule'):
+    assert query(f'SELECT COUNT(*) FROM {table}')[0][0] == 0
+  assert query('''
+    SELECT COUNT(*) FROM word_reviews
+    WHERE correct_count <> 0 OR wrong_count <> 0 OR last_reviewed IS NOT NULL
+  ''')[0][0] == 0
+
+  after_reset = rollups()
+  rebuild()
+  assert rollups() == after_reset
+
+def test_fast_reset_recreates_schema(client, query, wait_for_job):
+  before = query(SCHEMA)
+
+  reset(client, wait_for_job, fast=True)
+
+  assert query(SCHEMA) == before
+
+def test_fast_reset_keeps_triggers_working(client, query, wait_for_job):
+  reset(client, wait_for_job, fast=True)
+
+  session = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1})
+  assert session.status_code == 201
+  review = client.post(f"/api/study-sessions/{session.get_json()['id']}/review",
+                       json={'review_items': [{'word_id': 1, 'correct': True}]})
+  assert review.status_code == 201
+
+  assert query("SELECT value FROM counters WHERE name = 'review_items'")[0][0] == 1
+  assert query('SELECT review_count FROM study_sessions')[0][0] == 1
+  assert query('SELECT COUNT(*) FROM word_schedule')[0][0] == 1
+
+def test_reset_rejects_two_scopes(client):
+  response = client.post('/api/study-sessions/reset', json={'group_id': 1, 'study_activity_id': 1})
+  assert response.status_code == 400
+
+def test_reset_unknown_group(client):
+  response = client.post('/api/study-sessions/reset', json={'group_id': 999999})
+  assert response.status_code == 404
+
+def test_scoped_reset_replays_schedule(client, query, wait_for_job):
+  group_id = query('SELECT group_id FROM study_sessions LIMIT 1')[0][0]
+  affected = {row[0] for row in query('''
+    SELECT word_id FROM all_word_review_items
+    WHERE study_session_id IN (SELECT id FROM study_sessions WHERE group_id = ?)
+  ''', (group_id,))}
+
+  reset(client, wait_for_job, group_id=group_id)
+
+  # Each affected word is scheduled from its newest remaining answer, if any
+  expected = dict(query('''
+    SELECT word_id, datetime(MAX(created_at)) FROM all_word_review_items GROUP BY word_id
+  '''))
+  scheduled = dict(query('SELECT word_id, last_reviewed_at FROM word_schedule'))
+  for word_id in affected:
+    assert scheduled.get(word_id) == expected.get(word_id)
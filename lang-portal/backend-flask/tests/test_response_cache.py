@@ -0,0 +1,31 @@
+from flask import jsonify
+
+from lib.conditional import conditional
+
+def test_cached_response_is_dropped_on_write(client, app):
+  first = client.get('/api/groups')
+  assert client.get('/api/groups').get_data() == first.get_data()
+  assert app.response_cache.stats()['hits'] == 1
+
+  app.db.invalidate('groups')
+
+  client.get('/api/groups')
+  assert app.response_cache.stats()['hits'] == 1
+
+def test_response_built_during_a_write_is_not_cached(app):
+  calls = []
+
+  # The view reads its data, then a write to the table commits (and
+  # invalidates) before the response is stored
+  @app.route('/test/racing-write')
+  @conditional('words')
+  def racing_write():
+    calls.append(len(calls))
+    body = jsonify({"call": len(calls)})
+    app.db.invalidate('words')
+    return body
+
+  client = app.test_client()
+  assert client.get('/test/racing-write').get_json() == {"call": 1}
+  assert client.get('/test/racing-write').get_json() == {"call": 2}
+  assert app.response_cache.stats()['discarded'] == 2
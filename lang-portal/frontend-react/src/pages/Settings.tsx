@@ -5,10 +5,30 @@ export default function Settings() {
   const { theme, setTheme } = useTheme()
   const [showResetDialog, setShowResetDialog] = useState(false)
   const [resetConfirmation, setResetConfirmation] = useState('')
+  const [isResetting, setIsResetting] = useState(false)
+
+  // The reset runs as a background job; poll it until it has finished
+  const waitForJob = async (statusUrl: string) => {
+    while (true) {
+      const response = await fetch(`http://localhost:5000${statusUrl}`);
+      if (!response.ok) {
+        throw new Error('Failed to fetch reset status');
+      }
+      const job = await response.json();
+      if (job.status === 'succeeded') {
+        return job;
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Reset failed');
+      }
+      await new Promise((resolve) => setTimeout(resolve, 500));
+    }
+  }
 
   const handleReset = async () => {
     if (resetConfirmation.toLowerCase() === 'reset me') {
       try {
+        setIsResetting(true);
         const response = await fetch('http://localhost:5000/api/study-sessions/reset', {
           method: 'POST',
           headers: {
@@ -20,6 +40,11 @@ export default function Settings() {
           throw new Error('Failed to reset history');
         }
 
+        const data = await response.json();
+        if (data.status_url) {
+          await waitForJob(data.status_url);
+        }
+
         // Reset was successful
         setShowResetDialog(false);
         setResetConfirmation('');
@@ -29,6 +54,8 @@ export default function Settings() {
       } catch (error) {
         console.error('Error resetting history:', error);
         alert('Failed to reset history. Please try again.');
+      } finally {
+        setIsResetting(false);
       }
     }
   }
@@ -81,9 +108,10 @@ export default function Settings() {
               </button>
               <button
                 onClick={handleReset}
-                className="bg-red-500 hover:bg-red-600 text-white font-bold py-2 px-4 rounded"
+                disabled={isResetting}
+                className="bg-red-500 hover:bg-red-600 disabled:opacity-50 text-white font-bold py-2 px-4 rounded"
               >
-                Confirm Reset
+                {isResetting ? 'Resetting...' : 'Confirm Reset'}
               </button>
             </div>
           </div>